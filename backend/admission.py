@@ -0,0 +1,110 @@
+import contextlib
+import contextvars
+import math
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from . import metrics, scheduler
+from .config import ADMISSION_ENABLED, ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE_WAIT, ADMISSION_RETRY_AFTER_MAX
+
+# Scheduler pools each class of request waits on
+CLASS_POOLS = {
+    "chat": ("llm",),
+    "research": ("network",),
+    "plan": ("llm",),
+    "background": ("network", "llm"),
+}
+
+
+def parse_limits(spec):
+    """{"chat": 64.0, ...} from "chat=64,research=24"; classes left out are unlimited"""
+    limits = {}
+    for part in spec.split(","):
+        name, _, value = part.strip().partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = float(value)
+    return limits
+
+
+MAX_IN_FLIGHT = parse_limits(ADMISSION_MAX_IN_FLIGHT)
+MAX_QUEUE_WAIT = parse_limits(ADMISSION_MAX_QUEUE_WAIT)
+
+# The rejection of a research request admitted to be answered from stored research only
+_degraded = contextvars.ContextVar("degraded", default=None)
+
+
+def degraded():
+    """(status code, Retry-After seconds, reason) when the current request runs degraded, else None"""
+    return _degraded.get()
+
+
+def queue_wait(work_class):
+    """Estimated seconds before work_class gets a slot in its busiest pool"""
+    return max(scheduler.pools[pool].estimated_wait(work_class) for pool in CLASS_POOLS[work_class])
+
+
+def _retry_after(wait):
+    return max(1, min(ADMISSION_RETRY_AFTER_MAX, math.ceil(wait)))
+
+
+def check(work_class):
+    """None to admit a request, else (status code, Retry-After seconds, reason).
+
+    429 when the class already has its maximum of requests in flight, 503
+    when the estimated wait for a slot is longer than the class allows.
+    """
+    if not ADMISSION_ENABLED:
+        return None
+    wait = queue_wait(work_class)
+    limit = MAX_IN_FLIGHT.get(work_class)
+    if limit is not None and metrics.WORK_IN_FLIGHT.get(work_class=work_class) >= limit:
+        return 429, _retry_after(wait), f"Too many {work_class} requests in progress, retry later"
+    if wait > MAX_QUEUE_WAIT.get(work_class, math.inf):
+        return 503, _retry_after(wait), f"Backend saturated ({wait:.0f}s estimated wait for {work_class}), retry later"
+    return None
+
+
+@contextlib.contextmanager
+def admitted(work_class, rejection=None):
+    """Count the block as an in-flight request of work_class; a rejection marks it degraded"""
+    token = _degraded.set(rejection)
+    try:
+        with metrics.WORK_IN_FLIGHT.track(work_class=work_class):
+            yield
+    finally:
+        _degraded.reset(token)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware tagging each request's work with its class and session, and shedding it under overload.
+
+    routes maps route paths to work classes (others run as untracked
+    background work); degradable routes are admitted degraded instead of
+    rejected. It wraps the ASGI call rather than using call_next, so a
+    request stays counted and tagged until its body has been sent, or the
+    client went away, including for streaming responses.
+    """
+
+    def __init__(self, app, route_path, routes, degradable=()):
+        self.app = app
+        self.route_path = route_path
+        self.routes = routes
+        self.degradable = degradable
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        path = self.route_path(scope)
+        work_class = self.routes.get(path)
+        headers = Headers(scope=scope)
+        session = headers.get("x-session-id") or (scope["client"][0] if scope.get("client") else None)
+        if work_class is None:
+            with scheduler.work("background", session):
+                return await self.app(scope, receive, send)
+        rejection = check(work_class)
+        if rejection is not None and path not in self.degradable:
+            status_code, retry_after, reason = rejection
+            metrics.ADMISSION_SHED.inc(work_class=work_class, result=str(status_code))
+            response = JSONResponse({"detail": reason}, status_code=status_code, headers={"Retry-After": str(retry_after)})
+            return await response(scope, receive, send)
+        with scheduler.work(work_class, session), admitted(work_class, rejection):
+            await self.app(scope, receive, send)
@@ -1,13 +1,68 @@
-import requests
-import google.generativeai as genai
-from .fetchers import fetch_wikipedia_summary, fetch_duckduckgo, fetch_gnews
-from .config import GEMINI_API_KEY, NEWSAPI_KEY
+import contextvars
+import functools
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .fetchers import fetch_wikipedia_summary, fetch_wikipedia_summaries, fetch_duckduckgo, fetch_gnews, http_session
+from . import cassette, metrics, plan_parser, prompting, scheduler, tracing
+from .companies import aliases
+from .config import GEMINI_API_KEY, NEWSAPI_KEY, BATCH_RESEARCH_WORKERS
 
+GEMINI_MODEL = "models/gemini-2.5-flash"
+
+@functools.lru_cache(maxsize=1)
+def gemini_model():
+    """Configured Gemini client; google.generativeai is imported on first use"""
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+def _generate_text(prompt, kind):
+    """Run a Gemini completion (through the cassette when enabled) and return its text"""
+    def call():
+        model = gemini_model()
+        with scheduler.slot("llm"), metrics.track_upstream(f"gemini_{kind}", metrics.LLM_SECONDS, kind=kind):
+            response = model.generate_content(prompt)
+        return response.text if response and hasattr(response, 'text') else None
+
+    with tracing.span("llm.generate", kind=kind, model=GEMINI_MODEL, prompt_chars=len(prompt)) as span:
+        text = cassette.call(f"gemini_{kind}", {"model": GEMINI_MODEL, "prompt": prompt}, call)
+        span.set(response_chars=len(text or ""))
+    return text
+
+def _stream_text(prompt, kind):
+    """Yield a Gemini completion chunk by chunk as it is generated"""
+    model = gemini_model()
+    with tracing.open_span("llm.generate", kind=kind, model=GEMINI_MODEL, prompt_chars=len(prompt), stream=True) as span, \
+            scheduler.slot("llm"), metrics.track_upstream(f"gemini_{kind}", metrics.LLM_SECONDS, kind=kind):
+        response_chars = 0
+        for chunk in model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. only a finish reason)
+                continue
+            if text:
+                response_chars += len(text)
+                span.set(response_chars=response_chars)
+                yield text
+
+def _fetch(stage, fetcher, *args):
+    """Run a fetcher, recording its latency, in-flight count and errors under `stage`"""
+    with tracing.span(f"fetch.{stage}") as span, scheduler.slot("network"), \
+            metrics.track_upstream(stage, metrics.FETCH_SECONDS, stage=stage):
+        result = fetcher(*args)
+        if "error" in result:
+            metrics.UPSTREAM_ERRORS.inc(upstream=stage)
+            span.set(error=result["error"])
+    return result
+
+@cassette.recorded("wikipedia_fallback", source="wikipedia")
 def fetch_wikipedia_rest(company: str):
     """Fallback Wikipedia fetcher using REST API"""
     try:
         url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{company.replace(' ', '_')}"
-        r = requests.get(url, timeout=10)
+        r = http_session().get(url, timeout=10)
         r.raise_for_status()
         data = r.json()
         return {
@@ -19,11 +74,12 @@ def fetch_wikipedia_rest(company: str):
     except Exception as e:
         return {"source": "wikipedia", "error": str(e)}
 
+@cassette.recorded("duckduckgo_fallback", source="duckduckgo")
 def fetch_duckduckgo_fallback(company: str):
     """Fallback DuckDuckGo fetcher"""
     try:
         url = f"https://api.duckduckgo.com/?q={company}&format=json&no_html=1&skip_disambig=1"
-        r = requests.get(url, timeout=10)
+        r = http_session().get(url, timeout=10)
         data = r.json()
         return {
             "source": "duckduckgo", 
@@ -36,8 +92,12 @@ def fetch_duckduckgo_fallback(company: str):
     except Exception as e:
         return {"source": "duckduckgo", "error": str(e)}
 
-def research_company(company, fetch_news=True):
-    """Research a company and return raw data from all sources"""
+@cassette.scoped
+def research_company(company, fetch_news=True, wiki_result=None):
+    """Research a company and return raw data from all sources.
+
+    wiki_result is an already fetched Wikipedia summary (batch research).
+    """
     updates = []
     all_data = {}
     
@@ -46,51 +106,62 @@ def research_company(company, fetch_news=True):
     
     # Wikipedia
     updates.append("📚 Checking Wikipedia...")
-    wiki_result = fetch_wikipedia_summary(company)
+    if wiki_result is None:
+        wiki_result = _fetch("wikipedia_primary", fetch_wikipedia_summary, company)
     if "error" in wiki_result:
         updates.append("⚠️ Wikipedia primary method failed, trying alternative...")
-        wiki_result = fetch_wikipedia_rest(company)
+        wiki_result = _fetch("wikipedia_fallback", fetch_wikipedia_rest, company)
     all_data["wikipedia"] = wiki_result
     
+    # Wikipedia titles (after redirects) are the canonical names of companies;
+    # disambiguated guesses are not trusted as aliases
+    wiki_title = None
+    if "error" not in wiki_result and "note" not in wiki_result:
+        wiki_title = wiki_result.get("title")
+    company_id = aliases.learn(company, wiki_title)
+    
     # DuckDuckGo
     updates.append("🌐 Searching DuckDuckGo...")
-    ddg_result = fetch_duckduckgo(company)
+    ddg_result = _fetch("duckduckgo_primary", fetch_duckduckgo, company)
     if "error" in ddg_result:
         updates.append("⚠️ DuckDuckGo primary method failed, trying alternative...")
-        ddg_result = fetch_duckduckgo_fallback(company)
+        ddg_result = _fetch("duckduckgo_fallback", fetch_duckduckgo_fallback, company)
     all_data["duckduckgo"] = ddg_result
     
     # News - Search for specific business terms
     news_result = {"source": "news", "articles": []}
-    if fetch_news and NEWSAPI_KEY:
+    news_enabled = bool(NEWSAPI_KEY) or cassette.replaying()
+    if fetch_news and news_enabled:
         # Search for company-specific business news
         updates.append("📰 Fetching business news from GNews...")
         
         # Try different search queries to get better results
         search_queries = [
-            company,
-            f"{company} orders",
-            f"{company} contracts", 
-            f"{company} business news"
+            ("gnews_company", company),
+            ("gnews_orders", f"{company} orders"),
+            ("gnews_contracts", f"{company} contracts"),
+            ("gnews_business_news", f"{company} business news")
         ]
         
         all_articles = []
-        for query in search_queries:
+        for stage, query in search_queries:
             try:
-                news_data = fetch_gnews(query, NEWSAPI_KEY)
+                news_data = _fetch(stage, fetch_gnews, query, NEWSAPI_KEY)
                 if "articles" in news_data:
                     all_articles.extend(news_data["articles"])
             except:
                 continue
         
         # Remove duplicates based on title
-        unique_articles = []
-        seen_titles = set()
-        for article in all_articles:
-            title = article.get('title', '')
-            if title and title not in seen_titles:
-                seen_titles.add(title)
-                unique_articles.append(article)
+        with tracing.span("news.dedup", articles_in=len(all_articles)) as span:
+            unique_articles = []
+            seen_titles = set()
+            for article in all_articles:
+                title = article.get('title', '')
+                if title and title not in seen_titles:
+                    seen_titles.add(title)
+                    unique_articles.append(article)
+            span.set(articles_out=len(unique_articles))
         
         news_result["articles"] = unique_articles[:10]
         
@@ -99,7 +170,7 @@ def research_company(company, fetch_news=True):
         else:
             articles_count = len(news_result.get("articles", []))
             updates.append(f"✅ Found {articles_count} recent news articles")
-    elif fetch_news and not NEWSAPI_KEY:
+    elif fetch_news and not news_enabled:
         updates.append("⚠️ GNews API key not configured - skipping news")
     all_data["news"] = news_result
     
@@ -108,34 +179,52 @@ def research_company(company, fetch_news=True):
     return {
         "updates": updates,
         "data": all_data,
-        "company": company
+        "company": company,
+        "company_id": company_id
     }
 
-def generate_account_plan(company, research_data):
-    """Generate a complete account plan from research data"""
-    try:
-        if not GEMINI_API_KEY:
-            return {"error": "Gemini API key not configured"}
-        
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
+def research_companies(companies, fetch_news=True):
+    """Research many companies; Wikipedia summaries are fetched in batched queries.
 
-        # Prepare source text
-        wiki_data = research_data.get('wikipedia', {})
-        wiki_text = wiki_data.get('summary', 'No Wikipedia data available')
+    Names that are not exact article titles are searched individually by
+    research_company on the worker threads.
+
+    Returns one result per company, in order. A company that fails gets a
+    result with an "error" instead of failing the whole batch.
+    """
+    with tracing.span("fetch.wikipedia_batch", companies=len(companies)), scheduler.slot("network"), \
+            metrics.track_upstream("wikipedia_batch", metrics.FETCH_SECONDS, stage="wikipedia_batch"):
+        summaries = fetch_wikipedia_summaries(companies)
+
+    def research_one(company):
+        try:
+            return research_company(company, fetch_news, wiki_result=summaries.get(company))
+        except Exception as e:
+            return {"updates": [f"Error: {str(e)}"], "data": {}, "company": company, "error": str(e)}
+
+    # Each task runs in a copy of the caller's context so its spans join the request trace
+    with ThreadPoolExecutor(max_workers=BATCH_RESEARCH_WORKERS) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, research_one, company) for company in companies]
+        return [future.result() for future in futures]
+
+def _build_plan_prompt(company, research_data):
+    """Assemble the account plan prompt from research data"""
+    # Prepare source text
+    wiki_data = research_data.get('wikipedia', {})
+    wiki_text = wiki_data.get('summary', 'No Wikipedia data available')
+    
+    ddg_data = research_data.get('duckduckgo', {})
+    ddg_text = "No DuckDuckGo data"
+    if ddg_data.get('results'):
+        ddg_text = ddg_data['results'][0].get('body', 'No summary available')
         
-        ddg_data = research_data.get('duckduckgo', {})
-        ddg_text = "No DuckDuckGo data"
-        if ddg_data.get('results'):
-            ddg_text = ddg_data['results'][0].get('body', 'No summary available')
-            
-        news_data = research_data.get('news', {})
-        news_text = "No recent news found"
-        if news_data.get('articles'):
-            news_titles = [article.get('title', 'No title') for article in news_data['articles'][:3]]
-            news_text = ", ".join(news_titles)
+    news_data = research_data.get('news', {})
+    news_text = "No recent news found"
+    if news_data.get('articles'):
+        news_titles = [article.get('title', 'No title') for article in news_data['articles'][:3]]
+        news_text = ", ".join(news_titles)
 
-        prompt = f"""
+    return f"""
 Based on the research data below, create a COMPLETE account plan for {company} with the following sections:
 
 1. EXECUTIVE SUMMARY: 4-5 sentence overview of the company
@@ -173,104 +262,125 @@ ENGAGEMENT PLAN:
 Make each section comprehensive and actionable.
 """
 
-        response = model.generate_content(prompt)
+def plan_inputs_digest(company, research_data):
+    """Hash of the plan prompt; plans only need regenerating when it changes"""
+    return hashlib.sha1(_build_plan_prompt(company, research_data).encode("utf-8")).hexdigest()[:12]
+
+@cassette.scoped
+def generate_account_plan(company, research_data):
+    """Generate a complete account plan from research data"""
+    try:
+        if not GEMINI_API_KEY and not cassette.replaying():
+            return {"error": "Gemini API key not configured"}
+
+        with tracing.span("prompt.build", kind="plan"), metrics.PROMPT_BUILD_SECONDS.time(kind="plan"):
+            prompt = _build_plan_prompt(company, research_data)
+
+        plan_text = _generate_text(prompt, "plan")
         
-        if response and hasattr(response, 'text'):
-            return parse_account_plan(response.text)
+        if plan_text is not None:
+            with tracing.span("plan.parse"), metrics.PLAN_PARSE_SECONDS.time():
+                return parse_account_plan(plan_text)
         else:
             return {"error": "Failed to generate account plan"}
             
     except Exception as e:
         return {"error": f"Account plan generation failed: {str(e)}"}
 
+def stream_account_plan(company, research_data):
+    """Generate an account plan, yielding each section as soon as it is complete.
+
+    Yields {"section", "content"} events, then {"plan": sections} or {"error"}.
+    A section can be sent again if the model returns to its header later.
+    """
+    try:
+        if not GEMINI_API_KEY and not cassette.replaying():
+            yield {"error": "Gemini API key not configured"}
+            return
+
+        with tracing.span("prompt.build", kind="plan"), metrics.PROMPT_BUILD_SECONDS.time(kind="plan"):
+            prompt = _build_plan_prompt(company, research_data)
+
+        # Cassettes store whole completions, so recording and replay stream one chunk
+        if cassette.enabled():
+            with cassette.use_company(company):
+                text = _generate_text(prompt, "plan")
+            chunks = [text] if text is not None else []
+        else:
+            chunks = _stream_text(prompt, "plan")
+
+        parser = plan_parser.PlanParser()
+        received = False
+        # Parsing is interleaved with generation; only the time spent in the parser is counted
+        parse_seconds = 0.0
+        with tracing.open_span("plan.parse", stream=True) as span:
+            for chunk in chunks:
+                received = True
+                start = time.perf_counter()
+                closed = parser.feed(chunk)
+                parse_seconds += time.perf_counter() - start
+                for section, content in closed:
+                    yield {"section": section, "content": content}
+            if not received:
+                yield {"error": "Failed to generate account plan"}
+                return
+            start = time.perf_counter()
+            closed = parser.close()
+            sections = parser.sections()
+            parse_seconds += time.perf_counter() - start
+            metrics.PLAN_PARSE_SECONDS.observe(parse_seconds)
+            span.set(parse_ms=round(parse_seconds * 1000, 3))
+        for section, content in closed:
+            yield {"section": section, "content": content}
+        yield {"plan": sections}
+
+    except Exception as e:
+        yield {"error": f"Account plan generation failed: {str(e)}"}
+
 def parse_account_plan(full_plan_text):
     """Parse the generated account plan into sections"""
-    sections = {
-        "executive_summary": "",
-        "company_overview": "",
-        "key_contacts": "",
-        "strengths_weaknesses": "",
-        "opportunities_risks": "",
-        "engagement_plan": ""
-    }
-    
-    current_section = None
-    lines = full_plan_text.split('\n')
+    return plan_parser.parse(full_plan_text)
+
+# Approximate tokens used by the fixed instructions and headers of the chat prompt
+_CHAT_TEMPLATE_TOKENS = 150
+
+def _build_chat_prompt(user_message, conversation_history, research_data=None, summary=None, history_offset=0):
+    """Assemble the chat prompt, fitting history and research data into the token budget.
+
+    Recent messages are kept verbatim while they fit; older ones are folded
+    into `summary` (a prompting.RollingSummary, cached per session by the
+    caller). history_offset is the absolute position of conversation_history[0].
+    """
+    budget = prompting.chat_budget()
+    user_message = prompting.truncate_to_tokens(user_message, budget["user_message"])
     
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check if this line is a section header
-        if "EXECUTIVE SUMMARY" in line.upper():
-            current_section = "executive_summary"
-            continue
-        elif "COMPANY OVERVIEW" in line.upper():
-            current_section = "company_overview"
-            continue
-        elif "KEY CONTACTS" in line.upper():
-            current_section = "key_contacts"
-            continue
-        elif "STRENGTHS" in line.upper() and "WEAKNESSES" in line.upper():
-            current_section = "strengths_weaknesses"
-            continue
-        elif "OPPORTUNITIES" in line.upper() and "RISKS" in line.upper():
-            current_section = "opportunities_risks"
-            continue
-        elif "ENGAGEMENT PLAN" in line.upper():
-            current_section = "engagement_plan"
-            continue
+    # Add research data if available
+    research_context = ""
+    if research_data:
+        research_budget = budget["research"]
+        wiki_data = research_data.get('wikipedia', {})
+        wiki_text = wiki_data.get('summary', 'No Wikipedia data available')
+        wiki_text = prompting.truncate_to_tokens(wiki_text, research_budget // 2)
         
-        # Add content to current section
-        if current_section and line:
-            sections[current_section] += line + "\n"
-    
-    # Clean up the sections
-    for section in sections:
-        sections[section] = sections[section].strip()
-        if not sections[section]:
-            sections[section] = f"Content for {section.replace('_', ' ').title()} will be generated."
-    
-    return sections
-
-def generate_chat_response(user_message, conversation_history, research_data=None):
-    """Generate conversational response using Gemini with ALL research data"""
-    try:
-        if not GEMINI_API_KEY:
-            return "Gemini API key not configured. Please check your .env file."
+        ddg_data = research_data.get('duckduckgo', {})
+        ddg_text = "No DuckDuckGo data available"
+        if ddg_data.get('results'):
+            ddg_text = ddg_data['results'][0].get('body', 'No summary available')
+        ddg_text = prompting.truncate_to_tokens(ddg_text, research_budget // 4)
         
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("models/gemini-2.5-flash")
+        news_data = research_data.get('news', {})
+        news_articles = news_data.get('articles', [])
         
-        # Build context from conversation history
-        context = "Previous conversation:\n"
-        for msg in conversation_history[-6:]:
-            context += f"{msg['role']}: {msg['content']}\n"
+        if news_articles:
+            news_text = "RECENT NEWS ARTICLES:\n"
+            for i, article in enumerate(news_articles[:3], 1):
+                title = article.get('title', 'Untitled article')
+                news_text += f"{i}. {title}\n"
+            news_text = prompting.truncate_to_tokens(news_text, research_budget // 4)
+        else:
+            news_text = "No recent news articles found."
         
-        # Add research data if available
-        research_context = ""
-        if research_data:
-            wiki_data = research_data.get('wikipedia', {})
-            wiki_text = wiki_data.get('summary', 'No Wikipedia data available')
-            
-            ddg_data = research_data.get('duckduckgo', {})
-            ddg_text = "No DuckDuckGo data available"
-            if ddg_data.get('results'):
-                ddg_text = ddg_data['results'][0].get('body', 'No summary available')
-            
-            news_data = research_data.get('news', {})
-            news_articles = news_data.get('articles', [])
-            
-            if news_articles:
-                news_text = "RECENT NEWS ARTICLES:\n"
-                for i, article in enumerate(news_articles[:3], 1):
-                    title = article.get('title', 'Untitled article')
-                    news_text += f"{i}. {title}\n"
-            else:
-                news_text = "No recent news articles found."
-            
-            research_context = f"""
+        research_context = f"""
 RESEARCH DATA FOR {research_data.get('company', 'THE COMPANY').upper()}:
 
 WIKIPEDIA SUMMARY:
@@ -281,8 +391,24 @@ DUCKDUCKGO INFORMATION:
 
 {news_text}
 """
-        
-        prompt = f"""
+    
+    # Fit recent history into what is left, folding older turns into the summary
+    used = _CHAT_TEMPLATE_TOKENS + prompting.estimate_tokens(research_context) + prompting.estimate_tokens(user_message)
+    history_budget = budget["total"] - used - budget["summary"]
+    start, recent_lines = prompting.fit_history(conversation_history, history_budget)
+    if summary is None:
+        summary = prompting.RollingSummary(budget["summary"])
+    summary.fold(conversation_history, history_offset, history_offset + start)
+    
+    context = ""
+    summary_text = summary.text()
+    if summary_text:
+        context += f"Summary of earlier conversation:\n{summary_text}\n\n"
+    context += "Previous conversation:\n"
+    for line in recent_lines:
+        context += line + "\n"
+    
+    return f"""
 You are a helpful Company Research Assistant.
 
 {research_context}
@@ -299,8 +425,29 @@ Assistant: Respond conversationally and helpfully.
 - Keep responses natural but informative
 """
 
-        response = model.generate_content(prompt)
-        return response.text if response else "I apologize, but I couldn't generate a response."
+# Canned replies generate_chat_response returns instead of raising
+CHAT_ERROR_PREFIXES = (
+    "Gemini API key not configured",
+    "I apologize, but I couldn't generate a response",
+    "I encountered an error"
+)
+
+def is_chat_error(response_text):
+    return response_text.startswith(CHAT_ERROR_PREFIXES)
+
+def generate_chat_response(user_message, conversation_history, research_data=None, summary=None, history_offset=0):
+    """Generate conversational response using Gemini with ALL research data"""
+    try:
+        if not GEMINI_API_KEY and not cassette.replaying():
+            return "Gemini API key not configured. Please check your .env file."
+        
+        with tracing.span("prompt.build", kind="chat"), metrics.PROMPT_BUILD_SECONDS.time(kind="chat"):
+            prompt = _build_chat_prompt(user_message, conversation_history, research_data, summary, history_offset)
+
+        company = research_data.get('company') if research_data else None
+        with cassette.use_company(company):
+            response_text = _generate_text(prompt, "chat")
+        return response_text if response_text is not None else "I apologize, but I couldn't generate a response."
         
     except Exception as e:
         return f"I encountered an error: {str(e)}"
\ No newline at end of file
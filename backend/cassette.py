@@ -0,0 +1,180 @@
+import contextlib
+import contextvars
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from .config import CASSETTE_MODE, CASSETTE_DIR, CASSETTE_SCOPE, CASSETTE_NAME, CASSETTE_REPLAY_TIMING
+
+# Company the current research/chat call belongs to (used for per-company cassettes)
+_current_company = contextvars.ContextVar("cassette_company", default=None)
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recorded response matches a request"""
+
+
+class Cassette:
+    """Recorded calls as gzip-compressed JSON lines, with a key -> entries index built on load.
+
+    Every call is appended as its own gzip member, so recording one costs
+    the same however many the cassette already holds.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self.index = {}
+        self.cursors = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._add(json.loads(line))
+                    except ValueError:
+                        continue
+        except EOFError:
+            pass  # a write cut short by a crash; keep the entries before it
+
+    def _add(self, entry):
+        self.index.setdefault(entry["key"], []).append(len(self.entries))
+        self.entries.append(entry)
+
+    def find(self, key):
+        """Return the next recorded entry for key; repeats the last one once exhausted"""
+        with self.lock:
+            positions = self.index.get(key)
+            if not positions:
+                return None
+            n = self.cursors.get(key, 0)
+            self.cursors[key] = n + 1
+            return self.entries[positions[min(n, len(positions) - 1)]]
+
+    def append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.lock:
+            self._add(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+
+def enabled():
+    return CASSETTE_MODE in ("record", "replay")
+
+
+def replaying():
+    return CASSETTE_MODE == "replay"
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "default"
+
+
+def _cassette():
+    company = _current_company.get()
+    name = company if CASSETTE_SCOPE == "company" and company else CASSETTE_NAME
+    path = os.path.join(CASSETTE_DIR, f"{_slug(name)}.cassette.json.gz")
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def _request_key(kind, request):
+    raw = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def use_company(company):
+    """Route calls made inside the block to the cassette of the given company"""
+    token = _current_company.set(company)
+    try:
+        yield
+    finally:
+        _current_company.reset(token)
+
+
+def scoped(func):
+    """Decorator: run func under use_company() with its `company` argument"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        company = signature.bind(*args, **kwargs).arguments.get("company")
+        with use_company(company):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def call(kind, request, fn):
+    """Run fn() through the active cassette.
+
+    In record mode the result of fn() and its latency are written to the
+    cassette; in replay mode the recorded result is returned instead of
+    calling fn(). Results must be JSON serializable.
+    """
+    if not enabled():
+        return fn()
+
+    key = _request_key(kind, request)
+    cassette = _cassette()
+
+    if replaying():
+        entry = cassette.find(key)
+        if entry is None:
+            raise CassetteMiss(f"No recorded {kind} response in {cassette.path}")
+        if CASSETTE_REPLAY_TIMING == "original":
+            time.sleep(entry.get("elapsed", 0))
+        return entry["response"]
+
+    start = time.perf_counter()
+    response = fn()
+    cassette.append({
+        "key": key,
+        "kind": kind,
+        "request": request,
+        "response": response,
+        "elapsed": round(time.perf_counter() - start, 3),
+        "recorded_at": time.time()
+    })
+    return response
+
+
+def recorded(kind, ignore=(), source=None):
+    """Decorator for fetchers: record/replay their return value.
+
+    Arguments named in `ignore` (e.g. API keys) are left out of the request
+    key and never written to disk. On a replay miss the fetcher returns the
+    usual {"source": ..., "error": ...} dict.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            request = {k: v for k, v in bound.arguments.items() if k not in ignore}
+            try:
+                return call(kind, request, lambda: func(*args, **kwargs))
+            except CassetteMiss as e:
+                return {"source": source or kind, "error": str(e)}
+        return wrapper
+    return decorator
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from .config import ALIAS_FILE
+
+# Legal-form suffixes stripped from the end of a name ("Meta Platforms, Inc." -> "meta platforms")
+LEGAL_SUFFIXES = frozenset("""
+inc incorporated corp corporation co company ltd limited llc llp lp plc gmbh ag sa sas nv bv se spa
+srl ab asa oy kk pty pte bhd holdings
+""".split())
+
+# Well-known variants that Wikipedia titles alone do not connect
+SEED_ALIASES = {
+    "facebook": "Meta Platforms",
+    "meta": "Meta Platforms",
+    "facebook inc": "Meta Platforms",
+    "msft": "Microsoft",
+    "aapl": "Apple Inc.",
+    "apple computer": "Apple Inc.",
+    "google": "Google",
+    "alphabet": "Alphabet Inc.",
+    "ibm": "IBM",
+    "international business machines": "IBM",
+    "amazon com": "Amazon (company)",
+    "amazon": "Amazon (company)",
+    "tesla motors": "Tesla, Inc.",
+    "tesla": "Tesla, Inc.",
+}
+
+_APOSTROPHE = re.compile(r"['’]")
+_INITIAL_DOT = re.compile(r"\b([a-z])\.")
+_SPACED_AMPERSAND = re.compile(r"\s+&\s+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_PARENTHETICAL = re.compile(r"\s*\([^)]*\)")
+
+
+def normalize(name):
+    """Lowercase ASCII form of a company name without punctuation or legal suffixes"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = _PARENTHETICAL.sub(" ", text)
+    text = _APOSTROPHE.sub("", text)
+    text = _INITIAL_DOT.sub(r"\1", text)
+    text = _SPACED_AMPERSAND.sub(" and ", text).replace("&", "")
+    words = _NON_WORD.sub(" ", text).split()
+    if len(words) > 1 and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class AliasIndex:
+    """Maps normalized name variants to one canonical company id.
+
+    The canonical id is the normalized Wikipedia title, so "Meta", "Meta
+    Platforms" and "Facebook" all resolve to "meta platforms". Aliases are
+    seeded from SEED_ALIASES and learned from Wikipedia lookups; seeded ones
+    are never overwritten.
+    """
+
+    def __init__(self, path=ALIAS_FILE):
+        self.path = path
+        self.aliases = {}
+        self.display_names = {}
+        self.seeded = set()
+        self.lock = threading.Lock()
+        for alias, title in SEED_ALIASES.items():
+            self._add(normalize(alias), title)
+            self.seeded.add(normalize(alias))
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            for alias, title in stored.get("aliases", {}).items():
+                if alias not in self.seeded:
+                    self._add(alias, title)
+
+    def _add(self, alias, title):
+        canonical = normalize(title)
+        if not alias or not canonical:
+            return False
+        self.display_names.setdefault(canonical, title)
+        self.aliases.setdefault(canonical, canonical)
+        if self.aliases.get(alias) == canonical:
+            return False
+        self.aliases[alias] = canonical
+        return True
+
+    def resolve(self, name):
+        """Canonical id for any variant of a company name"""
+        key = normalize(name)
+        return self.aliases.get(key, key)
+
+    def lookup(self, normalized_name):
+        """Canonical id for an already-normalized name, or None when unknown"""
+        return self.aliases.get(normalized_name)
+
+    def display_name(self, canonical):
+        return self.display_names.get(canonical, canonical.title())
+
+    def learn(self, variant, title=None):
+        """Record that variant refers to the Wikipedia page `title`.
+
+        Without a title the variant becomes its own canonical entry unless it
+        already resolves to one. Returns the canonical id.
+        """
+        if not title:
+            known = self.lookup(normalize(variant))
+            if known:
+                return known
+            title = variant
+        changed = False
+        with self.lock:
+            for name in (variant, title):
+                alias = normalize(name)
+                if alias and alias not in self.seeded:
+                    changed = self._add(alias, title) or changed
+            canonical = self.aliases.get(normalize(variant), normalize(title))
+        if changed and self.path:
+            self.save()
+        return canonical
+
+    def save(self):
+        with self.lock:
+            data = {"aliases": {a: self.display_name(c) for a, c in self.aliases.items() if a not in self.seeded}}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def mentions(self, text, max_words=4):
+        """Canonical ids of known companies mentioned in text, longest phrases first"""
+        words = normalize(text).split()
+        found = []
+        for n in range(min(max_words, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                canonical = self.lookup(phrase)
+                if canonical is None and phrase.endswith("s"):
+                    # Possessives lose their apostrophe in normalize(): "microsoft's" -> "microsofts"
+                    canonical = self.lookup(phrase[:-1])
+                if canonical and canonical not in found:
+                    found.append(canonical)
+        return found
+
+
+aliases = AliasIndex()
@@ -6,4 +6,82 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY","")
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY","")
 BACKEND_HOST = os.getenv("BACKEND_HOST","0.0.0.0")
 BACKEND_PORT = int(os.getenv("BACKEND_PORT","8000"))
-BACKEND_URL = os.getenv("BACKEND_URL", f"http://{BACKEND_HOST}:{BACKEND_PORT}")
\ No newline at end of file
+BACKEND_URL = os.getenv("BACKEND_URL", f"http://{BACKEND_HOST}:{BACKEND_PORT}")
+
+# Record/replay of upstream calls: off | record | replay
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+# One cassette per "session" (CASSETTE_NAME) or per "company"
+CASSETTE_SCOPE = os.getenv("CASSETTE_SCOPE", "session").lower()
+CASSETTE_NAME = os.getenv("CASSETTE_NAME", "session")
+# Replay with the "original" recorded latency or with "zero" latency
+CASSETTE_REPLAY_TIMING = os.getenv("CASSETTE_REPLAY_TIMING", "original").lower()
+
+# Per-request tracing (kept in memory, optionally exported as OTLP/JSON lines)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+
+# Required in the X-Admin-Token header for /admin, /debug/traces and ?profile=1; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Import heavy clients and open upstream connections before serving traffic
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Server-side chat sessions
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "50"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "21600"))
+
+# Chat prompt budget (estimated tokens) and rolling summary size
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "6000"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "600"))
+CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "6"))
+
+# Chat response cache: similarity threshold (0-1) and lifetime counted from the research fetch
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.8"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "21600"))
+RESPONSE_CACHE_MAX_PER_COMPANY = int(os.getenv("RESPONSE_CACHE_MAX_PER_COMPANY", "200"))
+
+# Optional JSON file to persist learned company aliases across restarts
+ALIAS_FILE = os.getenv("ALIAS_FILE", "")
+
+# Rendered account plan exports kept in memory, keyed by plan content hash
+EXPORT_CACHE_SIZE = int(os.getenv("EXPORT_CACHE_SIZE", "64"))
+
+# Responses from the research endpoints smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+# Stored research not read for this long is kept zlib-compressed until its next use
+RESEARCH_COLD_AFTER_SECONDS = int(os.getenv("RESEARCH_COLD_AFTER_SECONDS", "900"))
+
+# Bulk research: companies per /api/research/batch call and how many are researched at once
+BATCH_RESEARCH_MAX = int(os.getenv("BATCH_RESEARCH_MAX", "200"))
+BATCH_RESEARCH_WORKERS = int(os.getenv("BATCH_RESEARCH_WORKERS", "4"))
+
+# Watchlist of key accounts refreshed in the background (WATCHLIST_FILE persists it across restarts)
+WATCHLIST_ENABLED = os.getenv("WATCHLIST_ENABLED", "true").lower() in ("1", "true", "yes")
+WATCHLIST_FILE = os.getenv("WATCHLIST_FILE", "")
+WATCHLIST_INTERVAL_SECONDS = int(os.getenv("WATCHLIST_INTERVAL_SECONDS", "21600"))
+# Local hours when due refreshes may run, e.g. "22-6" or "0-7,20-24"; empty means any time
+WATCHLIST_OFFPEAK_HOURS = os.getenv("WATCHLIST_OFFPEAK_HOURS", "22-6")
+# Research older than this is refreshed even outside the off-peak hours
+WATCHLIST_MAX_AGE_SECONDS = int(os.getenv("WATCHLIST_MAX_AGE_SECONDS", "86400"))
+WATCHLIST_CONCURRENCY = int(os.getenv("WATCHLIST_CONCURRENCY", "2"))
+WATCHLIST_TICK_SECONDS = int(os.getenv("WATCHLIST_TICK_SECONDS", "30"))
+WATCHLIST_PREGENERATE_PLANS = os.getenv("WATCHLIST_PREGENERATE_PLANS", "true").lower() in ("1", "true", "yes")
+# How long a research request for a watched company waits on its first refresh before researching itself
+WATCHLIST_RESEARCH_WAIT_SECONDS = float(os.getenv("WATCHLIST_RESEARCH_WAIT_SECONDS", "20"))
+
+# Work scheduler: concurrent upstream fetches and Gemini calls, and threads for request handlers
+SCHEDULER_NETWORK_SLOTS = int(os.getenv("SCHEDULER_NETWORK_SLOTS", "16"))
+SCHEDULER_LLM_SLOTS = int(os.getenv("SCHEDULER_LLM_SLOTS", "4"))
+SCHEDULER_HANDLER_THREADS = int(os.getenv("SCHEDULER_HANDLER_THREADS", "100"))
+
+# Admission control: per-class limits as "class=value" lists (chat, research, plan, background)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_MAX_IN_FLIGHT = os.getenv("ADMISSION_MAX_IN_FLIGHT", "chat=64,research=24,plan=12,background=4")
+ADMISSION_MAX_QUEUE_WAIT = os.getenv("ADMISSION_MAX_QUEUE_WAIT", "chat=10,research=30,plan=60,background=120")
+ADMISSION_RETRY_AFTER_MAX = int(os.getenv("ADMISSION_RETRY_AFTER_MAX", "10"))
@@ -0,0 +1,114 @@
+import gzip
+import json
+from fastapi.responses import Response
+from .config import COMPRESS_MIN_BYTES
+
+# Optional accelerators: orjson for JSON, msgpack and brotli when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def dumps(payload):
+    """JSON bytes, through orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _field_spec(fields):
+    """Nested dict of dotted paths; True marks a selected subtree"""
+    spec = {}
+    for path in fields.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = spec
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break  # a parent path is already selected whole
+            if child is None:
+                child = node[part] = {}
+            node = child
+        else:
+            node[parts[-1]] = True
+    return spec
+
+
+def _apply(value, spec):
+    if spec is True:
+        return value
+    if isinstance(value, list):
+        return [_apply(item, spec) for item in value]
+    if isinstance(value, dict):
+        return {key: _apply(value[key], sub) for key, sub in spec.items() if key in value}
+    return value
+
+
+def project(data, fields):
+    """Keep only the comma-separated dotted paths in fields.
+
+    Paths run through lists, so "news.articles.title" keeps the title of
+    every article. An empty string keeps nothing.
+    """
+    return _apply(data, _field_spec(fields))
+
+
+def _accepted_encodings(header):
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _compress(body, accept_encoding):
+    """(body, content-encoding) for the best encoding the client accepts"""
+    if len(body) < COMPRESS_MIN_BYTES or not accept_encoding:
+        return body, None
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = []
+    if brotli is not None:
+        candidates.append(("br", accepted.get("br", wildcard)))
+    candidates.append(("gzip", accepted.get("gzip", wildcard)))
+    # Highest q wins; on a tie the earlier (smaller output) encoding
+    name, q = max(candidates, key=lambda candidate: candidate[1])
+    if q <= 0:
+        return body, None
+    if name == "br":
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=5), "gzip"
+
+
+def respond(request, payload, status_code=200):
+    """Encode payload as msgpack or JSON per the Accept header, compressed per Accept-Encoding"""
+    accept = request.headers.get("accept", "")
+    if msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES):
+        body, media_type = msgpack.packb(payload, default=str, use_bin_type=True), "application/msgpack"
+    else:
+        body, media_type = dumps(payload), "application/json"
+    body, content_encoding = _compress(body, request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import re
+import textwrap
+import threading
+from collections import OrderedDict
+from . import metrics
+from .config import EXPORT_CACHE_SIZE
+
+SECTIONS = (
+    ("executive_summary", "Executive Summary"),
+    ("company_overview", "Company Overview"),
+    ("key_contacts", "Key Contacts"),
+    ("strengths_weaknesses", "Strengths & Weaknesses"),
+    ("opportunities_risks", "Opportunities & Risks"),
+    ("engagement_plan", "Engagement Plan")
+)
+
+_UNSAFE_FILENAME = re.compile(r"[^a-z0-9_]+")
+
+
+def _sections(plan):
+    return [(title, str(plan.get(key) or "")) for key, title in SECTIONS]
+
+
+def render_markdown(company, plan):
+    parts = [f"# Account Plan: {company}\n"]
+    for title, text in _sections(plan):
+        parts.append(f"## {title}\n\n{text.strip()}\n")
+    return "\n".join(parts).encode("utf-8")
+
+
+def render_docx(company, plan):
+    from docx import Document
+    doc = Document()
+    doc.add_heading(f"Account Plan: {company}", level=1)
+    for title, text in _sections(plan):
+        doc.add_heading(title, level=2)
+        doc.add_paragraph(text)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+# PDF layout in points (US Letter, 1 inch margins). Wrap widths assume
+# Helvetica's average glyph width of a little over half the font size.
+_PAGE_WIDTH, _PAGE_HEIGHT, _MARGIN = 612, 792, 72
+_STYLES = {"title": ("F2", 18), "heading": ("F2", 13), "body": ("F1", 10.5)}
+
+
+def _pdf_text(text):
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _pdf_lines(company, plan):
+    """(style, text) lines, wrapped to the page width"""
+    width = int((_PAGE_WIDTH - 2 * _MARGIN) / (_STYLES["body"][1] * 0.55))
+    lines = [("title", f"Account Plan: {company}"), ("body", "")]
+    for title, text in _sections(plan):
+        lines.append(("heading", title))
+        for paragraph in text.splitlines() or [""]:
+            lines.extend(("body", line) for line in textwrap.wrap(paragraph, width) or [""])
+        lines.append(("body", ""))
+    return lines
+
+
+def _pdf_pages(lines):
+    """Content streams, one per page"""
+    pages, ops = [], []
+    y = _PAGE_HEIGHT - _MARGIN
+    for style, text in lines:
+        font, size = _STYLES[style]
+        leading = size * 1.4
+        if y - leading < _MARGIN and ops:
+            pages.append(b"\n".join(ops))
+            ops, y = [], _PAGE_HEIGHT - _MARGIN
+        y -= leading
+        if text:
+            ops.append(b"BT /%s %g Tf %d %.2f Td (%s) Tj ET" % (font.encode(), size, _MARGIN, y, _pdf_text(text)))
+    pages.append(b"\n".join(ops))
+    return pages
+
+
+def render_pdf(company, plan):
+    """Minimal PDF 1.4 with the standard Helvetica fonts, no external dependency"""
+    pages = _pdf_pages(_pdf_lines(company, plan))
+    # Objects 1-4 are fixed; each page then takes a page object and a content stream
+    page_ids = [5 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    ]
+    for page_id, stream in zip(page_ids, pages):
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (_PAGE_WIDTH, _PAGE_HEIGHT, page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+FORMATS = {
+    "docx": (render_docx, "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "md": (render_markdown, "text/markdown; charset=utf-8"),
+    "pdf": (render_pdf, "application/pdf")
+}
+
+
+def content_hash(company, plan):
+    sections = [company] + [plan.get(key) or "" for key, _ in SECTIONS]
+    return hashlib.sha256(json.dumps(sections, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def filename(company, fmt):
+    slug = _UNSAFE_FILENAME.sub("_", company.lower()).strip("_") or "company"
+    return f"account_plan_{slug}.{fmt}"
+
+
+class ExportCache:
+    """Rendered documents keyed by format and plan content hash (LRU)"""
+
+    def __init__(self, max_entries=EXPORT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, company, plan, fmt):
+        """Returns (document bytes, content hash); renders only on a cache miss"""
+        renderer, _ = FORMATS[fmt]
+        digest = content_hash(company, plan)
+        key = (fmt, digest)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+        metrics.cache_lookup("export", data is not None)
+        if data is None:
+            data = renderer(company, plan)
+            with self.lock:
+                self.entries[key] = data
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return data, digest
+
+
+export_cache = ExportCache()
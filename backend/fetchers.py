@@ -1,48 +1,133 @@
+import functools
 import requests
-from duckduckgo_search import DDGS
-import wikipedia
+from requests.adapters import HTTPAdapter
+from . import cassette
 
-# Set a user agent for Wikipedia to avoid issues
-wikipedia.set_user_agent("CompanyResearchBot/1.0")
+# duckduckgo_search is imported on first use to keep startup fast
 
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+# Titles per MediaWiki query (the API limit for anonymous clients)
+WIKIPEDIA_BATCH_SIZE = 50
+# Intro extract as plain text, canonical URL and the disambiguation flag: everything
+# a summary needs, without loading the full article
+_SUMMARY_PARAMS = {
+    "action": "query",
+    "format": "json",
+    "formatversion": "2",
+    "prop": "extracts|info|pageprops",
+    "exintro": "1",
+    "explaintext": "1",
+    "exlimit": "max",
+    "inprop": "url",
+    "ppprop": "disambiguation",
+    "redirects": "1"
+}
+# Upper bound on continuation requests for one query (exlimit=max is 20 extracts per response)
+_MAX_CONTINUATIONS = 5
+
+@functools.lru_cache(maxsize=1)
+def http_session():
+    """Shared keep-alive session for plain HTTP fetchers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "CompanyResearchBot/1.0"
+    return session
+
+def _wikipedia_query(params):
+    """Run a summary query, following continuation (extracts come at most 20 pages per response).
+
+    Only the prop data of the first batch of pages is completed: once the
+    API reports batchcomplete, the remaining continuation would page on to
+    further search results, which are not needed.
+
+    Returns (pages, {normalized or redirected title: final title}).
+    """
+    request = dict(_SUMMARY_PARAMS, **params)
+    pages, renamed = {}, {}
+    for _ in range(_MAX_CONTINUATIONS):
+        r = http_session().get(WIKIPEDIA_API, params=request, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+        query = data.get("query", {})
+        for item in query.get("normalized", []) + query.get("redirects", []):
+            renamed[item["from"]] = item["to"]
+        for page in query.get("pages", []):
+            pages.setdefault(page.get("pageid") or page["title"], {}).update(page)
+        if "continue" not in data or data.get("batchcomplete"):
+            break
+        request = dict(request, **data["continue"])
+    return list(pages.values()), renamed
+
+def _is_disambiguation(page):
+    return "disambiguation" in page.get("pageprops", {})
+
+def _summary(page, note=None):
+    summary = page.get("extract", "")
+    result = {
+        "source": "wikipedia",
+        "title": page["title"],
+        "summary": summary[:500] + "..." if len(summary) > 500 else summary,
+        "url": page.get("fullurl", "")
+    }
+    if note:
+        result["note"] = note
+    return result
+
+@cassette.recorded("wikipedia_primary", source="wikipedia")
 def fetch_wikipedia_summary(company):
+    """Search Wikipedia and return the top hit's intro, in a single request"""
     try:
-        # Search for the page first to handle disambiguation
-        search_results = wikipedia.search(company)
-        if not search_results:
+        pages, _ = _wikipedia_query({"generator": "search", "gsrsearch": company, "gsrlimit": "5"})
+        pages.sort(key=lambda page: page.get("index", 0))
+        if not pages:
             return {"source": "wikipedia", "error": "No Wikipedia page found"}
-        
-        page = wikipedia.page(search_results[0], auto_suggest=True)
-        return {
-            "source": "wikipedia",
-            "title": page.title,
-            "summary": page.summary[:500] + "..." if len(page.summary) > 500 else page.summary,
-            "url": page.url
-        }
-    except wikipedia.DisambiguationError as e:
-        try:
-            # Try the first option from disambiguation
-            page = wikipedia.page(e.options[0])
-            return {
-                "source": "wikipedia",
-                "title": page.title,
-                "summary": page.summary[:500] + "..." if len(page.summary) > 500 else page.summary,
-                "url": page.url,
-                "note": f"Disambiguated from {company} to {e.options[0]}"
-            }
-        except Exception as e2:
-            return {"source": "wikipedia", "error": f"Disambiguation error: {str(e)}"}
+        if not _is_disambiguation(pages[0]):
+            return _summary(pages[0])
+        # Top hit is a disambiguation page: take the next real article
+        for page in pages[1:]:
+            if not _is_disambiguation(page):
+                return _summary(page, note=f"Disambiguated from {company} to {page['title']}")
+        return {"source": "wikipedia", "error": f"Disambiguation error: \"{pages[0]['title']}\" may refer to several pages"}
     except Exception as e:
         return {"source": "wikipedia", "error": str(e)}
 
+@cassette.recorded("wikipedia_batch", source="wikipedia")
+def fetch_wikipedia_summaries(companies):
+    """Summaries for the companies whose names are Wikipedia article titles, as {company: result}.
+
+    Names are looked up WIKIPEDIA_BATCH_SIZE per request. Names that are
+    missing, ambiguous or not valid titles are left out; callers search
+    for those one by one (research_company does so in its own worker).
+    """
+    results = {}
+    titles = [company for company in companies if "|" not in company]
+    for start in range(0, len(titles), WIKIPEDIA_BATCH_SIZE):
+        chunk = titles[start:start + WIKIPEDIA_BATCH_SIZE]
+        try:
+            pages, renamed = _wikipedia_query({"titles": "|".join(chunk)})
+        except Exception:
+            continue
+        by_title = {page["title"]: page for page in pages}
+        for company in chunk:
+            title = renamed.get(company, company)
+            page = by_title.get(renamed.get(title, title))
+            if page and "extract" in page and not page.get("missing") and not _is_disambiguation(page):
+                results[company] = _summary(page)
+    return results
+
+@cassette.recorded("duckduckgo_primary", source="duckduckgo")
 def fetch_duckduckgo(company, max_results=5):
     try:
+        from duckduckgo_search import DDGS
         with DDGS() as ddgs:
             results = list(ddgs.text(company, max_results=max_results))
             return {"source": "duckduckgo", "results": results}
     except Exception as e:
         return {"source": "duckduckgo", "error": str(e)}
 
+@cassette.recorded("gnews", ignore=("api_key",))
 def fetch_gnews(company, api_key, max_results=5):
     if not api_key:
         return {"source": "gnews", "error": "Missing API key."}
@@ -56,7 +141,7 @@ def fetch_gnews(company, api_key, max_results=5):
     }
 
     try:
-        r = requests.get(url, params=params, timeout=10)
+        r = http_session().get(url, params=params, timeout=10)
         r.raise_for_status()
         data = r.json()
         return {"source": "gnews", "articles": data.get("articles", [])}
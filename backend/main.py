@@ -1,20 +1,60 @@
-from fastapi import FastAPI
+import hmac
+import time
+from typing import List, Optional
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from .config import GEMINI_API_KEY, NEWSAPI_KEY, BACKEND_HOST, BACKEND_PORT
-from .agent import research_company, generate_chat_response, generate_account_plan
+from starlette.routing import Match
+from . import admission, encoding, export, metrics, profiling, scheduler, tracing, warmup
+from .companies import aliases, normalize
+from .sessions import sessions
+from .research_store import research_store
+from .response_cache import response_cache
+from .fetchers import fetch_wikipedia_summaries
+from .resolver import resolver
+from .watchlist import watchlist
+from .config import (GEMINI_API_KEY, NEWSAPI_KEY, BACKEND_HOST, BACKEND_PORT, ADMIN_TOKEN, PROFILE_MAX_SECONDS,
+                     WARMUP_ON_STARTUP, BATCH_RESEARCH_MAX, WATCHLIST_ENABLED, SCHEDULER_HANDLER_THREADS)
+from .agent import research_company, research_companies, generate_chat_response, generate_account_plan, stream_account_plan, is_chat_error
 
 class ResearchBody(BaseModel):
     company: str
     fetch_news: bool = True
 
+class BatchResearchBody(BaseModel):
+    companies: List[str]
+    fetch_news: bool = True
+
 class ChatBody(BaseModel):
     message: str
+    # Send session_id and only the new message; conversation_history is for older clients
+    session_id: Optional[str] = None
     conversation_history: list = []
 
+class SessionMessage(BaseModel):
+    role: str
+    content: str
+
+class SessionMessagesBody(BaseModel):
+    messages: List[SessionMessage]
+
 class AccountPlanBody(BaseModel):
     company: str
-    research_data: dict
+    # Either the research payload itself or the research_id returned by /api/research
+    research_data: Optional[dict] = None
+    research_id: Optional[str] = None
+
+class ExportBody(BaseModel):
+    company: str
+    plan: dict
+
+class WatchBody(BaseModel):
+    company: str
+    # Defaults to WATCHLIST_INTERVAL_SECONDS
+    interval_seconds: Optional[int] = None
+    fetch_news: bool = True
 
 app = FastAPI(title="Company Research Assistant API", version="1.0.0")
 
@@ -27,8 +67,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store research data in memory
-research_cache = {}
+def _route_path(scope):
+    """Route template for a request, so metric labels stay low-cardinality"""
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    path = _route_path(request.scope)
+    start = time.perf_counter()
+    with metrics.HTTP_IN_FLIGHT.track(path=path):
+        try:
+            return await call_next(request)
+        finally:
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, path=path)
+
+async def trace_requests(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or tracing.new_request_id()
+    with tracing.trace(request_id, f"{request.method} {request.url.path}") as root:
+        response = await call_next(request)
+        root.set(status_code=response.status_code)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+# Only installed with tracing on, so untraced requests skip the extra middleware hop
+if tracing.enabled():
+    app.middleware("http")(trace_requests)
+
+# Scheduler class of each route's upstream work; other routes run as background
+# and are not subject to admission control
+ROUTE_CLASSES = {
+    "/api/chat": "chat",
+    "/api/research": "research",
+    "/api/generate-account-plan": "plan",
+    "/api/generate-account-plan/stream": "plan",
+    "/api/research/batch": "background",
+}
+
+# Routes that may answer from stored data instead of being rejected under load
+DEGRADABLE_ROUTES = {"/api/research"}
+
+app.add_middleware(admission.AdmissionMiddleware, route_path=_route_path, routes=ROUTE_CLASSES, degradable=DEGRADABLE_ROUTES)
+
+def _is_admin(request: Request):
+    """Admin access needs ADMIN_TOKEN to be configured and sent as X-Admin-Token"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN)
+
+def _require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.middleware("http")
+async def request_profiling(request: Request, call_next):
+    if request.query_params.get("profile") not in ("1", "true") or not _is_admin(request):
+        return await call_next(request)
+    token = profiling.profile_requested.set(True)
+    try:
+        return await call_next(request)
+    finally:
+        profiling.profile_requested.reset(token)
+
+@app.on_event("startup")
+def raise_handler_threads():
+    # Handlers waiting for a scheduler slot hold a worker thread; keep enough
+    # threads that queued research and plans cannot starve chat of them
+    anyio.to_thread.current_default_thread_limiter().total_tokens = SCHEDULER_HANDLER_THREADS
+
+@app.on_event("startup")
+def startup_warmup():
+    if WARMUP_ON_STARTUP:
+        warmup.warmup()
+
+@app.on_event("startup")
+def start_watchlist():
+    if WATCHLIST_ENABLED:
+        watchlist.start()
+
+@app.on_event("shutdown")
+def stop_watchlist():
+    watchlist.stop()
+
 
 @app.get("/")
 def read_root():
@@ -36,18 +159,108 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "warmed_up": warmup.state["warmed_up"]}
 
-@app.post("/api/research")
-def api_research(body: ResearchBody):
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/traces")
+def list_traces(request: Request):
+    _require_admin(request)
+    return {"traces": tracing.recent_traces()}
+
+@app.get("/debug/traces/{request_id}")
+def get_trace(request: Request, request_id: str):
+    _require_admin(request)
+    trace = tracing.get_trace(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (expired or tracing disabled)")
+    return trace
+
+@app.post("/admin/profile", response_class=PlainTextResponse)
+def admin_profile(request: Request, seconds: float = 10, interval_ms: float = 5, include_idle: bool = False):
+    """Sample all request handler threads for N seconds; returns collapsed stacks for flamegraphs"""
+    _require_admin(request)
+    seconds = max(0.1, min(seconds, PROFILE_MAX_SECONDS))
+    try:
+        collapsed = profiling.sample(seconds, interval=max(interval_ms, 1) / 1000, include_idle=include_idle)
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(collapsed, headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
+
+@app.get("/api/resolve")
+def api_resolve(q: str, limit: int = 5, verify: bool = False):
+    """Typo-tolerant lookup of known and previously researched company names.
+
+    With verify, "known" tells whether q itself names a company (a known
+    name or alias, or a Wikipedia article), so callers do not correct a
+    real company into a similarly spelled one. Wikipedia is only asked
+    when the best candidate differs from q.
+    """
+    start = time.perf_counter()
+    candidates = resolver.lookup(q, limit=max(1, min(limit, 20)))
+    result = {"query": q, "candidates": candidates}
+    if verify:
+        known = bool(candidates and candidates[0]["distance"] == 0) or aliases.lookup(normalize(q)) is not None
+        if not known and candidates:
+            with scheduler.slot("network"):
+                known = q in fetch_wikipedia_summaries([q])
+        result["known"] = known
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+def _store_research(company, result):
+    """Cache the research data; plans can refer to it by research_id"""
+    research_store.put(result["company_id"], result["data"], company)
+    resolver.add_researched(result["company_id"])
+    result["research_id"] = result["company_id"]
+    return result
+
+def _stored_result(company, company_id, entry, update):
+    """Research result built from a stored entry instead of a live fetch"""
+    resolver.add_researched(company_id)
+    fetched = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.fetched_at))
+    return {
+        "updates": [update.format(company=entry.company, fetched=fetched)],
+        "data": entry.data,
+        "company": company,
+        "company_id": company_id,
+        "research_id": company_id,
+        "cached": True
+    }
+
+def _watched_research(company, cached=None):
+    """Research result from the stored entry of a watched company, or None"""
+    company_id, entry = cached or watchlist.cached_research(company)
+    if entry is None:
+        return None
+    return _stored_result(company, company_id, entry, "📌 {company} is on the watchlist - using research refreshed {fetched}")
+
+def _degraded_research(company, rejection):
+    """Stored research while upstreams are saturated; 429/503 with Retry-After when there is none"""
+    status_code, retry_after, reason = rejection
+    company_id = aliases.resolve(company)
+    entry = research_store.by_id(company_id)
+    if entry is None:
+        metrics.ADMISSION_SHED.inc(work_class="research", result=str(status_code))
+        raise HTTPException(status_code=status_code, detail=reason, headers={"Retry-After": str(retry_after)})
+    metrics.ADMISSION_SHED.inc(work_class="research", result="degraded")
+    result = _stored_result(company, company_id, entry, "⚠️ Live sources are busy - showing research on {company} from {fetched}")
+    result["degraded"] = True
+    return result
+
+@profiling.profiled
+def _research(body: ResearchBody):
     try:
+        watched = _watched_research(body.company)
+        if watched is not None:
+            return watched
         result = research_company(
             company=body.company,
             fetch_news=body.fetch_news
         )
-        # Cache the research data
-        research_cache[body.company.lower()] = result["data"]
-        return result
+        return _store_research(body.company, result)
     except Exception as e:
         return {
             "updates": [f"Error: {str(e)}"],
@@ -55,26 +268,98 @@ def api_research(body: ResearchBody):
             "company": body.company
         }
 
+@app.post("/api/research")
+def api_research(body: ResearchBody, request: Request, fields: Optional[str] = None):
+    """fields= limits `data` to comma-separated dotted paths, e.g. wikipedia.summary,news.articles.title"""
+    rejection = admission.degraded()
+    result = _degraded_research(body.company, rejection) if rejection is not None else _research(body)
+    if fields is not None:
+        result["data"] = encoding.project(result["data"], fields)
+    return encoding.respond(request, result)
+
+@app.post("/api/research/batch")
+def api_research_batch(body: BatchResearchBody, request: Request, fields: Optional[str] = None):
+    """Research many companies; Wikipedia is queried for up to 50 of them per request"""
+    companies = list(dict.fromkeys(name.strip() for name in body.companies if name.strip()))
+    if len(companies) > BATCH_RESEARCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_RESEARCH_MAX} companies per batch")
+    # Watched companies are answered from their scheduled research; first
+    # refreshes still running are waited for together, not one after another
+    cached = watchlist.cached_research_many(companies)
+    watched = {company: _watched_research(company, cached[company]) for company in companies}
+    to_research = [company for company in companies if watched[company] is None]
+    researched = dict(zip(to_research, research_companies(to_research, body.fetch_news)))
+    results = []
+    for company in companies:
+        result = watched[company]
+        if result is None:
+            result = researched[company]
+            if "company_id" in result:
+                result = _store_research(company, result)
+        if fields is not None:
+            result["data"] = encoding.project(result["data"], fields)
+        results.append(result)
+    return encoding.respond(request, {"results": results})
+
+@app.get("/api/research/{research_id}")
+def get_research(research_id: str, request: Request, fields: Optional[str] = None):
+    entry = research_store.by_id(research_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Research not found (run /api/research again)")
+    data = entry.data if fields is None else encoding.project(entry.data, fields)
+    return encoding.respond(request, {
+        "research_id": research_id,
+        "company": entry.company,
+        "version": entry.version,
+        "fetched_at": entry.fetched_at,
+        "data": data
+    })
+
 @app.post("/api/chat")
+@profiling.profiled
 def api_chat(body: ChatBody):
     try:
         # Check if we have research data for any mentioned company
         research_data = None
-        for company in research_cache:
-            if company in body.message.lower():
-                research_data = research_cache[company]
-                research_data["company"] = company
-                break
+        company, research = research_store.find_in_message(body.message)
+        if research is not None:
+            research_data = dict(research.data, company=company)
+        metrics.cache_lookup("research", research_data is not None)
         
-        response = generate_chat_response(
-            user_message=body.message,
-            conversation_history=body.conversation_history,
-            research_data=research_data
-        )
+        session = None
+        summary = None
+        history_offset = 0
+        conversation_history = body.conversation_history
+        if body.session_id or not conversation_history:
+            session = sessions.get_or_create(body.session_id)
+            history_offset, conversation_history = session.window()
+            summary = session.summary
+        
+        response = None
+        if response_cache is not None and research is not None:
+            response = response_cache.lookup(company, research, body.message)
+        cached = response is not None
+        
+        if not cached:
+            response = generate_chat_response(
+                user_message=body.message,
+                conversation_history=conversation_history,
+                research_data=research_data,
+                summary=summary,
+                history_offset=history_offset
+            )
+            if response_cache is not None and research is not None and not is_chat_error(response):
+                response_cache.store(company, research, body.message, response)
+        
+        if session is not None:
+            session.append("user", body.message)
+            session.append("assistant", response)
         
         return {
             "response": response,
-            "research_available": research_data is not None
+            "research_available": research_data is not None,
+            "cached": cached,
+            "session_id": session.id if session else None
         }
         
     except Exception as e:
@@ -83,14 +368,105 @@ def api_chat(body: ChatBody):
             "research_available": False
         }
 
+@app.post("/api/sessions")
+def create_session():
+    return {"session_id": sessions.get_or_create().id}
+
+@app.get("/api/sessions/{session_id}")
+def get_session(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"session_id": session.id, "messages": session.history()}
+
+@app.post("/api/sessions/{session_id}/messages")
+def append_session_messages(session_id: str, body: SessionMessagesBody):
+    """Record messages produced outside /api/chat (research reports, plans) in the session log"""
+    session = sessions.get_or_create(session_id)
+    for message in body.messages:
+        session.append(message.role, message.content)
+    return {"session_id": session.id, "message_count": len(session.messages)}
+
+@app.delete("/api/sessions/{session_id}")
+def delete_session(session_id: str):
+    return {"deleted": sessions.delete(session_id)}
+
+def _plan_research_data(body: AccountPlanBody):
+    if body.research_id:
+        entry = research_store.by_id(body.research_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Research not found (run /api/research again)")
+        return entry.data
+    return body.research_data or {}
+
 @app.post("/api/generate-account-plan")
+@profiling.profiled
 def api_generate_account_plan(body: AccountPlanBody):
+    if body.research_id:
+        plan = watchlist.cached_plan(body.research_id)
+        if plan is not None:
+            return plan
+    research_data = _plan_research_data(body)
     try:
-        account_plan = generate_account_plan(body.company, body.research_data)
+        account_plan = generate_account_plan(body.company, research_data)
         return account_plan
     except Exception as e:
         return {"error": f"Failed to generate account plan: {str(e)}"}
 
+@app.post("/api/generate-account-plan/stream")
+def api_stream_account_plan(body: AccountPlanBody):
+    """Newline-delimited JSON: one event per completed section, then the full plan or an error"""
+    plan = watchlist.cached_plan(body.research_id) if body.research_id else None
+    if plan is not None:
+        events = [{"section": section, "content": content} for section, content in plan.items()] + [{"plan": plan}]
+    else:
+        events = stream_account_plan(body.company, _plan_research_data(body))
+    return StreamingResponse(
+        (encoding.dumps(event) + b"\n" for event in events),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/api/watchlist")
+def list_watchlist():
+    return {"companies": [watched.to_dict() for watched in list(watchlist.companies.values())]}
+
+@app.post("/api/watchlist")
+def add_to_watchlist(body: WatchBody):
+    """Keep a company's research (and account plan) refreshed in the background"""
+    watched = watchlist.add(body.company, body.interval_seconds, body.fetch_news)
+    return watched.to_dict()
+
+@app.post("/api/watchlist/{company}/refresh")
+def refresh_watched(company: str):
+    watched = watchlist.refresh_now(company)
+    if watched is None:
+        raise HTTPException(status_code=404, detail="Company is not on the watchlist")
+    return watched.to_dict()
+
+@app.delete("/api/watchlist/{company}")
+def remove_from_watchlist(company: str):
+    return {"deleted": watchlist.remove(company)}
+
+@app.post("/api/export/{fmt}")
+def api_export(fmt: str, body: ExportBody):
+    """Render an account plan as docx, md or pdf in memory; repeat renders are served from cache"""
+    if fmt not in export.FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unknown export format: {fmt}")
+    try:
+        data, digest = export.export_cache.render(body.company, body.plan, fmt)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="python-docx not installed. Run: pip install python-docx")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create document: {str(e)}")
+    return Response(
+        data,
+        media_type=export.FORMATS[fmt][1],
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.filename(body.company, fmt)}"',
+            "ETag": f'"{digest}"'
+        }
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=BACKEND_HOST, port=BACKEND_PORT)
\ No newline at end of file
@@ -0,0 +1,202 @@
+import contextlib
+import threading
+import time
+
+# Latency buckets in seconds, wide enough for slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = self.header()
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = self.header()
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state["counts"]):
+                    cumulative += count
+                    labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+                lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+FETCH_SECONDS = Histogram(
+    "research_fetch_seconds", "Latency of each research fetcher call", ["stage"])
+LLM_SECONDS = Histogram(
+    "llm_request_seconds", "Latency of Gemini calls", ["kind"])
+PROMPT_BUILD_SECONDS = Histogram(
+    "prompt_build_seconds", "Time spent assembling LLM prompts", ["kind"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+PLAN_PARSE_SECONDS = Histogram(
+    "plan_parse_seconds", "Time spent in parse_account_plan",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5))
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latency of API requests", ["method", "path"])
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "API requests currently being handled", ["path"])
+UPSTREAM_IN_FLIGHT = Gauge(
+    "upstream_requests_in_flight", "Upstream fetches and LLM calls currently running", ["upstream"])
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors_total", "Failed upstream fetches and LLM calls", ["upstream"])
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result", ["cache", "result"])
+SCHEDULER_QUEUE_WAIT_SECONDS = Histogram(
+    "scheduler_queue_wait_seconds", "Time work waited for a network or LLM slot", ["pool", "work_class"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+SCHEDULER_QUEUED = Gauge(
+    "scheduler_queued", "Work waiting for a slot", ["pool", "work_class"])
+SCHEDULER_ACTIVE = Gauge(
+    "scheduler_active", "Slots in use", ["pool"])
+WORK_IN_FLIGHT = Gauge(
+    "work_requests_in_flight", "Admitted requests being handled, by scheduler class", ["work_class"])
+ADMISSION_SHED = Counter(
+    "admission_shed_total", "Requests rejected (429/503) or answered from stored data (degraded) under load",
+    ["work_class", "result"])
+WATCHLIST_REFRESHES = Counter(
+    "watchlist_refreshes_total", "Scheduled watchlist refreshes by outcome", ["result"])
+WATCHLIST_PLANS = Counter(
+    "watchlist_plan_generations_total", "Account plans regenerated for watched companies", ["result"])
+WATCHLIST_SCHEDULER_ERRORS = Counter(
+    "watchlist_scheduler_errors_total", "Watchlist scheduler passes that failed")
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+@contextlib.contextmanager
+def track_upstream(upstream, histogram, **labels):
+    """Time an upstream call and count it as in flight; exceptions count as errors"""
+    with UPSTREAM_IN_FLIGHT.track(upstream=upstream), histogram.time(**labels):
+        try:
+            yield
+        except Exception:
+            UPSTREAM_ERRORS.inc(upstream=upstream)
+            raise
+
+
+def _render_cache_ratios():
+    lines = ["# HELP cache_hit_ratio Share of cache lookups that were hits",
+             "# TYPE cache_hit_ratio gauge"]
+    with CACHE_REQUESTS.lock:
+        caches = sorted({cache for cache, _ in CACHE_REQUESTS.values})
+        for cache in caches:
+            hits = CACHE_REQUESTS.values.get((cache, "hit"), 0)
+            total = hits + CACHE_REQUESTS.values.get((cache, "miss"), 0)
+            ratio = hits / total if total else 0.0
+            lines.append(f'cache_hit_ratio{{cache="{cache}"}} {_format_value(ratio)}')
+    return lines
+
+
+def render():
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(_render_cache_ratios())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,124 @@
+SECTION_KEYS = (
+    "executive_summary",
+    "company_overview",
+    "key_contacts",
+    "strengths_weaknesses",
+    "opportunities_risks",
+    "engagement_plan"
+)
+
+# Header rules in priority order: a line is a header for the first rule
+# whose keywords all appear in it (case-insensitively)
+_HEADER_RULES = (
+    (("EXECUTIVE SUMMARY",), "executive_summary"),
+    (("COMPANY OVERVIEW",), "company_overview"),
+    (("KEY CONTACTS",), "key_contacts"),
+    (("STRENGTHS", "WEAKNESSES"), "strengths_weaknesses"),
+    (("OPPORTUNITIES", "RISKS"), "opportunities_risks"),
+    (("ENGAGEMENT PLAN",), "engagement_plan")
+)
+# A header line must contain every keyword of its rule, so searching for
+# one keyword per rule (the longest, usually the rarest) finds all of them
+_ANCHOR_KEYWORDS = tuple(max(words, key=len) for words, _ in _HEADER_RULES)
+
+
+def header_section(line):
+    """Section key if the line is a section header, else None"""
+    upper = line.upper()
+    for words, section in _HEADER_RULES:
+        if all(word in upper for word in words):
+            return section
+    return None
+
+
+def _keyword_lines(upper):
+    """Sorted indexes of the lines in `upper` that may be section headers"""
+    positions = []
+    for word in _ANCHOR_KEYWORDS:
+        pos = upper.find(word)
+        while pos != -1:
+            positions.append(pos)
+            pos = upper.find(word, pos + len(word))
+    line_numbers = []
+    line, offset = 0, 0
+    for pos in sorted(positions):
+        line += upper.count("\n", offset, pos)
+        offset = pos
+        if not line_numbers or line_numbers[-1] != line:
+            line_numbers.append(line)
+    return line_numbers
+
+
+def placeholder(section):
+    return f"Content for {section.replace('_', ' ').title()} will be generated."
+
+
+class PlanParser:
+    """Incremental account plan parser for streamed LLM output.
+
+    feed() takes chunks of any size and returns the sections that were
+    closed by a following header in that chunk, as (key, content) pairs;
+    close() flushes the rest. Each batch of complete lines is upper-cased
+    once and searched for one keyword per header; only lines with a hit are
+    checked against the header rules, and the text between headers goes
+    into per-section line lists that are joined once at the end.
+    """
+
+    def __init__(self):
+        self.lines = {key: [] for key in SECTION_KEYS}
+        self.current = None
+        self.partial = ""
+
+    def _content(self, lines):
+        if self.current is not None:
+            self.lines[self.current].extend(line for line in map(str.strip, lines) if line)
+
+    def _consume(self, block, closed):
+        """Process a block of complete lines"""
+        lines = block.split("\n")
+        start = 0
+        # upper() never adds or removes newlines, so line numbers carry over
+        for line_number in _keyword_lines(block.upper()):
+            section = header_section(lines[line_number])
+            if section is None:
+                continue
+            self._content(lines[start:line_number])
+            start = line_number + 1
+            if self.current is not None and self.current != section:
+                closed.append((self.current, self.content(self.current)))
+            self.current = section
+        self._content(lines[start:])
+
+    def feed(self, chunk):
+        closed = []
+        cut = chunk.rfind("\n")
+        if cut == -1:
+            self.partial += chunk
+            return closed
+        self._consume(self.partial + chunk[:cut], closed)
+        self.partial = chunk[cut + 1:]
+        return closed
+
+    def close(self):
+        """Flush the trailing line; returns the last open section, if any"""
+        closed = []
+        self._consume(self.partial, closed)
+        self.partial = ""
+        if self.current is not None:
+            closed.append((self.current, self.content(self.current)))
+            self.current = None
+        return closed
+
+    def content(self, section):
+        return "\n".join(self.lines[section])
+
+    def sections(self):
+        return {key: self.content(key) or placeholder(key) for key in SECTION_KEYS}
+
+
+def parse(text):
+    """Parse a complete plan into its sections"""
+    parser = PlanParser()
+    parser.feed(text)
+    parser.close()
+    return parser.sections()
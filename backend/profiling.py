@@ -0,0 +1,114 @@
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Set by the HTTP middleware when a request asks for ?profile=1
+profile_requested = contextvars.ContextVar("profile_requested", default=False)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Stdlib modules whose frames mean "this thread is parked waiting for work"
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py", "base_events.py")
+
+_sampler_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a sampling run is already in progress"""
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+def _stack(frame):
+    names = []
+    in_app = False
+    leaf_file = os.path.basename(frame.f_code.co_filename)
+    while frame is not None:
+        names.append(_frame_name(frame))
+        if frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+            in_app = True
+        frame = frame.f_back
+    names.reverse()
+    idle = leaf_file in _IDLE_FILES and not in_app
+    return names, idle
+
+
+def sample(seconds, interval=0.005, include_idle=False):
+    """Sample the stacks of all threads for `seconds` and return collapsed stacks.
+
+    The output is one "frame;frame;frame count" line per distinct stack, the
+    format flamegraph.pl, speedscope and inferno read directly. Threads parked
+    in the stdlib waiting for work are skipped unless include_idle is set.
+    """
+    if not _sampler_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profiling run is already in progress")
+    try:
+        own_thread = threading.get_ident()
+        thread_names = {}
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                names, idle = _stack(frame)
+                if idle and not include_idle:
+                    continue
+                if thread_id not in thread_names:
+                    thread_names = {t.ident: t.name for t in threading.enumerate()}
+                thread = thread_names.get(thread_id, str(thread_id)).replace(";", ":").replace(" ", "_")
+                stacks[";".join([thread] + names)] += 1
+            time.sleep(interval)
+    finally:
+        _sampler_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def summarize(profiler, limit=25):
+    """Top functions by cumulative time as pstats text"""
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def profiled(func):
+    """Decorator for route handlers: when ?profile=1 was requested, run the
+    handler under cProfile and attach the summary to the response dict"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profile_requested.get():
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            return func(*args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.disable()
+        if isinstance(result, dict):
+            # Response encoding happens after the handler returns, so time an
+            # equivalent json.dumps to show what the payload costs to serialize
+            start = time.perf_counter()
+            response_bytes = len(json.dumps(result, default=str).encode("utf-8"))
+            result["profile"] = {
+                "summary": summarize(profiler),
+                "response_bytes": response_bytes,
+                "serialize_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+        return result
+    return wrapper
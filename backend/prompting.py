@@ -0,0 +1,105 @@
+import re
+import threading
+from collections import deque
+from .config import CHAT_PROMPT_TOKEN_BUDGET, CHAT_SUMMARY_TOKENS, CHAT_RECENT_MESSAGES
+
+# Gemini averages roughly four characters per token for English text; an
+# estimate is enough to keep prompts bounded without a tokenizer round-trip
+CHARS_PER_TOKEN = 4
+SUMMARY_LINE_CHARS = 240
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to roughly max_tokens, preferring a word boundary"""
+    max_chars = max(max_tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(max_chars - 3, 0)]
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.8:
+        cut = cut[:space]
+    return cut + "..."
+
+
+def summarize_message(message):
+    """One-line extractive summary of a message: role plus its first sentence"""
+    content = _WHITESPACE.sub(" ", message.get("content", "")).strip()
+    first = _SENTENCE_END.split(content, 1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3].rsplit(" ", 1)[0] + "..."
+    return f"{message.get('role', 'user')}: {first}"
+
+
+class RollingSummary:
+    """Summary of the turns that fell out of the recent window.
+
+    Messages are addressed by their absolute position in the conversation;
+    fold() only summarizes positions it has not seen yet, so updating the
+    summary costs O(new messages). The oldest lines are dropped once the
+    summary exceeds max_tokens.
+    """
+
+    def __init__(self, max_tokens=CHAT_SUMMARY_TOKENS):
+        self.max_tokens = max_tokens
+        self.lines = deque()
+        self.tokens = 0
+        self.upto = 0
+        self.lock = threading.Lock()
+
+    def fold(self, messages, offset, upto):
+        """Summarize messages[i] (absolute position offset + i) for positions below upto"""
+        with self.lock:
+            for position in range(max(self.upto, offset), upto):
+                line = summarize_message(messages[position - offset])
+                self.lines.append(line)
+                self.tokens += estimate_tokens(line) + 1
+            self.upto = max(self.upto, upto)
+            while self.lines and self.tokens > self.max_tokens:
+                self.tokens -= estimate_tokens(self.lines.popleft()) + 1
+
+    def text(self):
+        with self.lock:
+            return "\n".join(self.lines)
+
+
+def fit_history(messages, max_tokens, max_messages=CHAT_RECENT_MESSAGES):
+    """Pick the newest messages that fit in max_tokens.
+
+    Returns (start, lines): messages[start:] are represented by lines, oldest
+    first. A message too large for the remaining budget is truncated rather
+    than dropped when it is the newest one.
+    """
+    lines = []
+    remaining = max_tokens
+    start = len(messages)
+    for message in reversed(messages[-max_messages:] if max_messages else []):
+        line = f"{message['role']}: {message['content']}"
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            if lines or remaining < 32:
+                break
+            line = truncate_to_tokens(line, remaining - 1)
+            cost = remaining
+        lines.append(line)
+        remaining -= cost
+        start -= 1
+    lines.reverse()
+    return start, lines
+
+
+def chat_budget():
+    """Token allowances for each part of the chat prompt"""
+    budget = CHAT_PROMPT_TOKEN_BUDGET
+    return {
+        "total": budget,
+        "user_message": budget // 5,
+        "research": budget * 2 // 5,
+        "summary": min(CHAT_SUMMARY_TOKENS, budget // 10)
+    }
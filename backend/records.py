@@ -0,0 +1,121 @@
+import json
+import sys
+import zlib
+
+
+def _text(value):
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+class WikipediaSummary:
+    __slots__ = ("title", "summary", "url", "note", "error")
+
+    def __init__(self, title="", summary="", url="", note=None, error=None):
+        self.title = title
+        self.summary = summary
+        self.url = url
+        self.note = note
+        self.error = error
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(_text(data.get("title")), _text(data.get("summary")), _text(data.get("url")),
+                   data.get("note"), data.get("error"))
+
+    def to_dict(self):
+        data = {"source": "wikipedia"}
+        if self.error is not None:
+            data["error"] = self.error
+            return data
+        data.update(title=self.title, summary=self.summary, url=self.url)
+        if self.note is not None:
+            data["note"] = self.note
+        return data
+
+
+class SearchResult:
+    __slots__ = ("title", "body", "href")
+
+    def __init__(self, title, body, href):
+        self.title = title
+        self.body = body
+        self.href = href
+
+    def to_dict(self):
+        return {"title": self.title, "body": self.body, "href": self.href}
+
+
+class Article:
+    __slots__ = ("title", "description", "url", "published_at", "source_name")
+
+    def __init__(self, title, description, url, published_at, source_name):
+        self.title = title
+        self.description = description
+        self.url = url
+        self.published_at = published_at
+        # A handful of outlets repeat across every company's news
+        self.source_name = sys.intern(source_name)
+
+    @classmethod
+    def from_dict(cls, data):
+        source = data.get("source")
+        source_name = source.get("name") if isinstance(source, dict) else source
+        return cls(_text(data.get("title")), _text(data.get("description")), _text(data.get("url")),
+                   _text(data.get("publishedAt")), _text(source_name))
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "publishedAt": self.published_at,
+            "source": {"name": self.source_name}
+        }
+
+
+class ResearchRecord:
+    """The parts of research_company() data that prompts, chat and the API read.
+
+    Upstream results are arbitrary JSON (GNews articles carry full content,
+    images and nested source objects); records keep only the used fields in
+    __slots__ objects, and to_dict() rebuilds the usual nested dict shape.
+    """
+    __slots__ = ("wikipedia", "search_results", "search_error", "articles")
+
+    def __init__(self, wikipedia, search_results=(), search_error=None, articles=()):
+        self.wikipedia = wikipedia
+        self.search_results = tuple(search_results)
+        self.search_error = search_error
+        self.articles = tuple(articles)
+
+    @classmethod
+    def from_data(cls, data):
+        """Build from research_company()["data"] (or a to_dict() result)"""
+        ddg = data.get("duckduckgo") or {}
+        results = [
+            SearchResult(_text(r.get("title")), _text(r.get("body")), _text(r.get("href")))
+            for r in ddg.get("results") or () if isinstance(r, dict)
+        ]
+        articles = [Article.from_dict(a) for a in (data.get("news") or {}).get("articles") or () if isinstance(a, dict)]
+        return cls(WikipediaSummary.from_dict(data.get("wikipedia") or {}), results, ddg.get("error"), articles)
+
+    def to_dict(self):
+        ddg = {"source": "duckduckgo"}
+        if self.search_error is not None:
+            ddg["error"] = self.search_error
+        else:
+            ddg["results"] = [result.to_dict() for result in self.search_results]
+        return {
+            "wikipedia": self.wikipedia.to_dict(),
+            "duckduckgo": ddg,
+            "news": {"source": "news", "articles": [article.to_dict() for article in self.articles]}
+        }
+
+
+def pack(record):
+    """zlib-compressed JSON of a record, for entries that are rarely read"""
+    return zlib.compress(json.dumps(record.to_dict(), separators=(",", ":")).encode("utf-8"), 6)
+
+
+def unpack(blob):
+    return ResearchRecord.from_data(json.loads(zlib.decompress(blob).decode("utf-8")))
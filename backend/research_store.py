@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+import time
+from . import records
+from .companies import aliases
+from .config import RESEARCH_COLD_AFTER_SECONDS
+
+
+class StoredResearch:
+    """One company's research: a compact record, zlib-packed while cold"""
+    __slots__ = ("company", "version", "fetched_at", "last_access", "_record", "_packed", "_lock")
+
+    def __init__(self, record, version, company, lock):
+        self.company = company
+        self.version = version
+        self.fetched_at = time.time()
+        self.last_access = time.monotonic()
+        self._record = record
+        self._packed = None
+        self._lock = lock
+
+    def record(self):
+        with self._lock:
+            if self._record is None:
+                self._record = records.unpack(self._packed)
+                self._packed = None
+            self.last_access = time.monotonic()
+            return self._record
+
+    @property
+    def data(self):
+        """The research data as a fresh nested dict"""
+        return self.record().to_dict()
+
+    @property
+    def cold(self):
+        return self._record is None
+
+    def freeze(self):
+        with self._lock:
+            if self._record is not None:
+                self._packed = records.pack(self._record)
+                self._record = None
+
+
+class ResearchStore:
+    """In-memory research results by canonical company id, with a content version per entry.
+
+    Entries not read for RESEARCH_COLD_AFTER_SECONDS are compressed and
+    transparently unpacked on their next read.
+    """
+
+    def __init__(self, cold_after=RESEARCH_COLD_AFTER_SECONDS):
+        self.entries = {}
+        self.cold_after = cold_after
+        self.lock = threading.Lock()
+        self.last_sweep = time.monotonic()
+
+    def put(self, company_id, data, display_name=None):
+        record = records.ResearchRecord.from_data(data)
+        compact = record.to_dict()
+        version = hashlib.sha1(json.dumps(compact, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+        with self.lock:
+            current = self.entries.get(company_id)
+            if current is not None and current.version == version:
+                # Unchanged content: keep the entry (and anything keyed on its version) fresh
+                current.fetched_at = time.time()
+                entry = current
+            else:
+                entry = StoredResearch(record, version, display_name or aliases.display_name(company_id), self.lock)
+                self.entries[company_id] = entry
+        self._maybe_sweep()
+        return entry
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self.last_sweep < min(self.cold_after, 60):
+            return
+        self.last_sweep = now
+        for entry in list(self.entries.values()):
+            if not entry.cold and now - entry.last_access > self.cold_after:
+                entry.freeze()
+
+    def by_id(self, company_id):
+        """Entry for a canonical company id, as returned in research_id"""
+        self._maybe_sweep()
+        return self.entries.get(company_id)
+
+    def get(self, company):
+        """Entry for any name variant of a company"""
+        return self.by_id(aliases.resolve(company))
+
+    def find_in_message(self, message):
+        """First stored company mentioned in message, as (company_id, entry)"""
+        self._maybe_sweep()
+        for company_id in aliases.mentions(message):
+            entry = self.entries.get(company_id)
+            if entry is not None:
+                return company_id, entry
+        return None, None
+
+    def __contains__(self, company):
+        return aliases.resolve(company) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+research_store = ResearchStore()
@@ -0,0 +1,204 @@
+import os
+import threading
+from .companies import aliases, normalize, SEED_ALIASES
+
+KNOWN_COMPANIES_FILE = os.path.join(os.path.dirname(__file__), "data", "companies.txt")
+
+
+def _deletes(term, max_distance):
+    """All strings reachable from term by deleting up to max_distance characters"""
+    results = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            if len(word) <= 1:
+                continue
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def _one_edit_apart(a, b):
+    """1 when two different strings are one insertion, deletion, substitution or transposition apart, else 2"""
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return 1 if a[i:] == b[i + 1:] else 2
+    if a[i + 1:] == b[i + 1:]:
+        return 1
+    if i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]:
+        return 1
+    return 2
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance (adjacent transpositions count as one edit).
+
+    Only the diagonal band |i - j| <= max_distance is computed and the scan
+    stops once a whole row exceeds max_distance; returns max_distance + 1 for
+    anything farther than that.
+    """
+    if a == b:
+        return 0
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > max_distance:
+        return max_distance + 1
+    if max_distance == 1:
+        # Short queries only allow one edit: a linear scan instead of the table
+        return _one_edit_apart(a, b)
+    # Every edit brings in or drops at most one character, so letters only one side uses bound the distance
+    set_a, set_b = set(a), set(b)
+    if len(set_a - set_b) > max_distance or len(set_b - set_a) > max_distance:
+        return max_distance + 1
+    # A shared prefix or suffix never changes the distance; only the rest needs the table
+    start = 0
+    while start < len_a and start < len_b and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len_a - start and end < len_b - start and a[len_a - 1 - end] == b[len_b - 1 - end]:
+        end += 1
+    if start or end:
+        a, b = a[start:len_a - end], b[start:len_b - end]
+        len_a, len_b = len(a), len(b)
+        if not len_a or not len_b:
+            return min(len_a + len_b, max_distance + 1)
+    too_far = max_distance + 1
+    previous_previous = None
+    previous = [j if j <= max_distance else too_far for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        current = [too_far] * (len_b + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len_b, i + max_distance) + 1):
+            char_b = b[j - 1]
+            value = previous[j - 1] + (char_a != char_b)
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b and previous_previous[j - 2] + 1 < value:
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        previous_previous, previous = previous, current
+    return min(previous[len_b], too_far)
+
+
+class CompanyResolver:
+    """SymSpell-style fuzzy index over company names.
+
+    Every indexed name contributes the deletes of its first prefix_length
+    characters; a query generates its own prefix deletes, so candidates within
+    max_distance edits are found with a handful of dict lookups instead of a
+    scan. Candidates are then verified with a bounded edit distance.
+    """
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms = {}
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def add(self, display_name, company_id=None, term=None):
+        """Index a company under its normalized name (or an explicit alias term)"""
+        term = term or normalize(display_name)
+        if not term:
+            return
+        company_id = company_id or aliases.resolve(display_name)
+        with self.lock:
+            if term in self.terms:
+                return
+            self.terms[term] = (display_name, company_id)
+            keys = _deletes(term[:self.prefix_length], self.max_distance)
+            first_word = term.split(" ", 1)[0]
+            if first_word != term:
+                # Let queries that name only the leading word reach multi-word names
+                keys |= _deletes(first_word[:self.prefix_length], self.max_distance)
+            for delete in keys:
+                self.index.setdefault(delete, []).append(term)
+
+    def add_researched(self, company_id):
+        """Index a researched company under its canonical name.
+
+        The spelling it was asked for is only an alias (see AliasIndex.learn),
+        so a misspelled request never becomes a suggestion itself.
+        """
+        self.add(aliases.display_name(company_id), company_id)
+
+    def _match(self, query_term, query_words, term, max_distance):
+        """(distance, matched_length, is_prefix) for term, or None when too far.
+
+        Multi-word names also match on their leading words, so "samsnug"
+        finds "samsung electronics"; such prefix matches rank below full ones.
+        """
+        distance = edit_distance(query_term, term, max_distance)
+        if distance <= max_distance:
+            return distance, len(term), False
+        term_words = term.split()
+        if len(term_words) > query_words:
+            head = " ".join(term_words[:query_words])
+            distance = edit_distance(query_term, head, max_distance)
+            if distance <= max_distance:
+                return distance, len(head), True
+        return None
+
+    def lookup(self, query, limit=5):
+        """Ranked candidates: [{"name", "company_id", "distance", "score", "prefix"}], best first"""
+        query_term = normalize(query)
+        if not query_term:
+            return []
+        query_words = len(query_term.split())
+        max_distance = self.max_distance if len(query_term) > 4 else min(self.max_distance, 1)
+        seen = set()
+        matches = {}
+        for delete in _deletes(query_term[:self.prefix_length], max_distance):
+            for term in self.index.get(delete, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                match = self._match(query_term, query_words, term, max_distance)
+                if match is None:
+                    continue
+                distance, matched_length, is_prefix = match
+                display_name, company_id = self.terms[term]
+                best = matches.get(company_id)
+                if best is None or (distance, is_prefix) < (best["distance"], best["prefix"]):
+                    matches[company_id] = {
+                        "name": display_name,
+                        "company_id": company_id,
+                        "distance": distance,
+                        "score": round(1 - distance / max(len(query_term), matched_length), 3),
+                        "prefix": is_prefix
+                    }
+        ranked = sorted(matches.values(), key=lambda m: (m["distance"], m["prefix"], -m["score"], m["name"]))
+        return ranked[:limit]
+
+    def __len__(self):
+        return len(self.terms)
+
+
+def load_known_companies(resolver, path=KNOWN_COMPANIES_FILE):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            name = line.strip()
+            if name and not name.startswith("#"):
+                resolver.add(name)
+    for alias, title in SEED_ALIASES.items():
+        resolver.add(aliases.display_name(normalize(title)), term=normalize(alias))
+
+
+resolver = CompanyResolver()
+load_known_companies(resolver)
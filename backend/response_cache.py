@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from . import metrics
+from .config import (RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL_SECONDS,
+                     RESPONSE_CACHE_MAX_PER_COMPANY)
+
+_WORD = re.compile(r"[a-z0-9]+")
+# "microsoft's" -> "microsoft", so possessives do not leave a stray "s" behind
+_POSSESSIVE = re.compile(r"['\u2019]s\b")
+
+STOPWORDS = frozenset("""
+a an the of to in on for at by with about from into and or but is are was were be been being
+do does did what which who whom whose when where why how can could would should will shall may
+might must i me my we our you your they them their it its this that these those there here
+please tell give show let know any some much many more most very just also
+has have had get gets got win wins won
+""".split())
+
+
+def _stem(word):
+    for suffix in ("ing", "ies", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def normalize_question(question, company=""):
+    """Content words of a question, stemmed, without stopwords or the company name"""
+    company_words = set(_WORD.findall(_POSSESSIVE.sub("", company.lower())))
+    return [_stem(w) for w in _WORD.findall(_POSSESSIVE.sub("", question.lower()))
+            if len(w) > 1 and w not in STOPWORDS and w not in company_words]
+
+
+def _trigrams(words):
+    text = " ".join(words)
+    return {text[i:i + 3] for i in range(len(text) - 2)} or {text}
+
+
+def _jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ("words", "grams", "version", "expires_at", "response")
+
+    def __init__(self, words, version, expires_at, response):
+        self.words = frozenset(words)
+        self.grams = frozenset(_trigrams(words))
+        self.version = version
+        self.expires_at = expires_at
+        self.response = response
+
+
+class ResponseCache:
+    """Chat answers per company, matched on lexical similarity of the question.
+
+    Similarity is the mean of word-set and character-trigram Jaccard scores
+    over normalized questions, so rephrasings ("what are their recent
+    contracts?" / "recent contracts?") hit while different topics do not.
+    Entries are bound to the research version they were answered from and
+    expire RESPONSE_CACHE_TTL_SECONDS after that research was fetched.
+    """
+
+    def __init__(self, threshold=RESPONSE_CACHE_THRESHOLD, ttl=RESPONSE_CACHE_TTL_SECONDS,
+                 max_per_company=RESPONSE_CACHE_MAX_PER_COMPANY):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_company = max_per_company
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _score(self, entry, words, grams):
+        return (_jaccard(entry.words, words) + _jaccard(entry.grams, grams)) / 2
+
+    def lookup(self, company, research, question):
+        """Cached response for a similar question about the same research, or None"""
+        words = normalize_question(question, company)
+        if not words:
+            return None
+        words_set, grams = set(words), _trigrams(words)
+        now = time.time()
+        best, best_score = None, 0.0
+        with self.lock:
+            bucket = self.entries.get(company)
+            if bucket:
+                for key, entry in list(bucket.items()):
+                    if entry.version != research.version or entry.expires_at < now:
+                        del bucket[key]
+                        continue
+                    score = self._score(entry, words_set, grams)
+                    if score > best_score:
+                        best, best_score = key, score
+                if best is not None and best_score >= self.threshold:
+                    bucket.move_to_end(best)
+                    response = bucket[best].response
+                else:
+                    response = None
+            else:
+                response = None
+        metrics.cache_lookup("chat_response", response is not None)
+        return response
+
+    def store(self, company, research, question, response):
+        words = normalize_question(question, company)
+        if not words:
+            return
+        entry = _Entry(words, research.version, research.fetched_at + self.ttl, response)
+        with self.lock:
+            bucket = self.entries.setdefault(company, OrderedDict())
+            bucket[" ".join(words)] = entry
+            bucket.move_to_end(" ".join(words))
+            while len(bucket) > self.max_per_company:
+                bucket.popitem(last=False)
+
+    def invalidate(self, company):
+        with self.lock:
+            self.entries.pop(company, None)
+
+
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
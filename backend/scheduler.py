@@ -0,0 +1,132 @@
+import contextlib
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from . import metrics
+from .config import SCHEDULER_NETWORK_SLOTS, SCHEDULER_LLM_SLOTS
+
+# Priority classes, most urgent first
+CLASSES = ("chat", "research", "plan", "background")
+_PRIORITY = {name: i for i, name in enumerate(CLASSES)}
+
+# Work class and fairness key (session) of the current request; untagged work is background
+_work = contextvars.ContextVar("work", default=("background", None))
+
+
+@contextlib.contextmanager
+def work(work_class, session=None):
+    """Run the block as work_class on behalf of session"""
+    token = _work.set((work_class if work_class in _PRIORITY else "background", session))
+    try:
+        yield
+    finally:
+        _work.reset(token)
+
+
+def current():
+    """(work class, session) of the running code"""
+    return _work.get()
+
+
+class _Waiter:
+    __slots__ = ("event", "enqueued")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.enqueued = time.perf_counter()
+
+
+class Pool:
+    """A fixed number of slots for one kind of work (network fetches, LLM calls).
+
+    When all slots are busy, callers queue by priority class; within a class
+    waiting sessions take turns, so one session's burst of calls cannot hold
+    back another session's single call. A released slot is handed straight
+    to the next waiter.
+    """
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = max(1, size)
+        self.active = 0
+        # Moving average of how long a slot is held, for wait estimates
+        self.hold_seconds = 0.0
+        self.lock = threading.Lock()
+        # Per class: session -> deque of waiters, in round-robin order
+        self.queues = [OrderedDict() for _ in CLASSES]
+
+    def queued(self, work_class=None):
+        """Waiters in one class, or in all classes"""
+        with self.lock:
+            queues = self.queues if work_class is None else [self.queues[_PRIORITY[work_class]]]
+            return sum(len(waiters) for queue in queues for waiters in queue.values())
+
+    def estimated_wait(self, work_class):
+        """Seconds a new work_class caller would wait: waiters it cannot overtake times the average hold"""
+        with self.lock:
+            if self.active < self.size:
+                return 0.0
+            ahead = sum(len(waiters) for queue in self.queues[:_PRIORITY[work_class] + 1] for waiters in queue.values())
+            return (ahead + 1) / self.size * self.hold_seconds
+
+    def _next_waiter(self):
+        for queue in self.queues:
+            if queue:
+                session, waiters = next(iter(queue.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(session)
+                else:
+                    del queue[session]
+                return waiter
+        return None
+
+    def acquire(self):
+        work_class, session = current()
+        start = time.perf_counter()
+        with self.lock:
+            if self.active < self.size:
+                self.active += 1
+                waiter = None
+            else:
+                waiter = _Waiter()
+                self.queues[_PRIORITY[work_class]].setdefault(session, deque()).append(waiter)
+                metrics.SCHEDULER_QUEUED.inc(pool=self.name, work_class=work_class)
+        if waiter is not None:
+            try:
+                waiter.event.wait()
+            finally:
+                metrics.SCHEDULER_QUEUED.dec(pool=self.name, work_class=work_class)
+        metrics.SCHEDULER_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, pool=self.name, work_class=work_class)
+
+    def release(self, held=None):
+        with self.lock:
+            if held is not None:
+                self.hold_seconds = held if not self.hold_seconds else 0.8 * self.hold_seconds + 0.2 * held
+            waiter = self._next_waiter()
+            if waiter is None:
+                self.active -= 1
+        if waiter is not None:
+            waiter.event.set()
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            with metrics.SCHEDULER_ACTIVE.track(pool=self.name):
+                yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+
+pools = {
+    "network": Pool("network", SCHEDULER_NETWORK_SLOTS),
+    "llm": Pool("llm", SCHEDULER_LLM_SLOTS),
+}
+
+
+def slot(pool):
+    """Hold a slot of the named pool for the block, queueing by the current work class"""
+    return pools[pool].slot()
@@ -0,0 +1,85 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from .prompting import RollingSummary
+from .config import SESSION_MAX_MESSAGES, SESSION_MAX_SESSIONS, SESSION_TTL_SECONDS
+
+
+class Session:
+    """Append-only message log for one conversation; keeps the newest max_messages"""
+
+    def __init__(self, session_id, max_messages):
+        self.id = session_id
+        self.messages = deque(maxlen=max_messages)
+        # Total messages ever appended; positions older than the deque were evicted
+        self.total = 0
+        # Rolling summary of turns that left the prompt window, updated incrementally
+        self.summary = RollingSummary()
+        self.created = time.time()
+        self.last_access = self.created
+        self.lock = threading.Lock()
+
+    def append(self, role, content):
+        with self.lock:
+            self.messages.append({"role": role, "content": content})
+            self.total += 1
+            self.last_access = time.time()
+
+    def history(self):
+        return self.window()[1]
+
+    def window(self):
+        """(absolute position of the first retained message, retained messages)"""
+        with self.lock:
+            self.last_access = time.time()
+            return self.total - len(self.messages), list(self.messages)
+
+
+class SessionStore:
+    """In-memory sessions with LRU eviction and an idle TTL"""
+
+    def __init__(self, max_sessions=SESSION_MAX_SESSIONS, max_messages=SESSION_MAX_MESSAGES,
+                 ttl=SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if now - oldest.last_access <= self.ttl and len(self.sessions) <= self.max_sessions:
+                break
+            self.sessions.popitem(last=False)
+
+    def get(self, session_id):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None and time.time() - session.last_access > self.ttl:
+                del self.sessions[session_id]
+                session = None
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id=None):
+        session = self.get(session_id) if session_id else None
+        if session is not None:
+            return session
+        with self.lock:
+            session = Session(session_id or uuid.uuid4().hex, self.max_messages)
+            self.sessions[session.id] = session
+            self._expire(time.time())
+            return session
+
+    def delete(self, session_id):
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+sessions = SessionStore()
@@ -0,0 +1,198 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from .config import TRACING_ENABLED, TRACE_BUFFER_SIZE, TRACE_EXPORT_FILE
+
+SERVICE_NAME = "company-research-assistant"
+
+_current_span = contextvars.ContextVar("trace_span", default=None)
+
+# Finished traces by request id, oldest first (bounded ring buffer)
+_traces = OrderedDict()
+_traces_lock = threading.Lock()
+_export_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent", "attributes", "children", "start_ns", "end_ns", "error")
+
+    def __init__(self, name, trace_id, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.children = []
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin_ns=None):
+        origin_ns = self.start_ns if origin_ns is None else origin_ns
+        end_ns = self.end_ns or time.time_ns()
+        span = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "offset_ms": round((self.start_ns - origin_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin_ns) for child in self.children]
+        }
+        if self.error:
+            span["error"] = self.error
+        return span
+
+
+class _NoopSpan:
+    """Shared stand-in returned when no trace is active"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def enabled():
+    return TRACING_ENABLED
+
+
+@contextlib.contextmanager
+def _run(span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def span(name, **attributes):
+    """Open a child span of the current span; a no-op when no trace is active"""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    child = Span(name, parent.trace_id, parent, attributes)
+    parent.children.append(child)
+    return _run(child)
+
+
+@contextlib.contextmanager
+def open_span(name, **attributes):
+    """Like span(), but the span does not become the current span.
+
+    For spans held open across the yields of a generator: each resumption
+    may run in a different context, where the current span could not be
+    restored. Spans opened inside the block attach to the enclosing span.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP
+        return
+    child = Span(name, parent.trace_id, parent, attributes)
+    parent.children.append(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+
+
+@contextlib.contextmanager
+def trace(request_id, name, **attributes):
+    """Trace everything inside the block as one request; stored under request_id"""
+    root = Span(name, request_id, attributes=attributes)
+    try:
+        with _run(root):
+            yield root
+    finally:
+        with _traces_lock:
+            _traces[request_id] = root
+            _traces.move_to_end(request_id)
+            while len(_traces) > TRACE_BUFFER_SIZE:
+                _traces.popitem(last=False)
+        if TRACE_EXPORT_FILE:
+            _export(root)
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def get_trace(request_id):
+    with _traces_lock:
+        root = _traces.get(request_id)
+    return root.to_dict() if root else None
+
+
+def recent_traces():
+    with _traces_lock:
+        roots = list(_traces.items())
+    return [
+        {"request_id": request_id, "name": root.name, "duration_ms": root.to_dict()["duration_ms"]}
+        for request_id, root in reversed(roots)
+    ]
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_spans(span, trace_id, parent_id=""):
+    spans = [{
+        "traceId": trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": parent_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+    }]
+    for child in span.children:
+        spans.extend(_otlp_spans(child, trace_id, span.span_id))
+    return spans
+
+
+def _export(root):
+    """Append the trace to TRACE_EXPORT_FILE as one OTLP/JSON line (file exporter format)"""
+    trace_id = hashlib.md5(root.trace_id.encode("utf-8")).hexdigest()
+    root.attributes.setdefault("request_id", root.trace_id)
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": _otlp_spans(root, trace_id)}]
+        }]
+    }
+    try:
+        with _export_lock, open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":"), default=str) + "\n")
+    except OSError as e:
+        print(f"Trace export error: {e}")
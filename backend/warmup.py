@@ -0,0 +1,32 @@
+import time
+from .config import GEMINI_API_KEY, NEWSAPI_KEY
+from .fetchers import http_session
+from .agent import gemini_model
+
+# Hosts the fetchers talk to; a HEAD request leaves a pooled keep-alive connection behind
+UPSTREAM_HOSTS = ["https://en.wikipedia.org/", "https://api.duckduckgo.com/"]
+
+state = {"warmed_up": False, "timings": {}}
+
+
+def _step(timings, name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        timings[name] = round(time.perf_counter() - start, 4)
+    except Exception as e:
+        timings[name] = f"failed: {e}"
+
+
+def warmup():
+    """Import deferred modules, build the Gemini client and pre-open upstream connections"""
+    timings = {}
+    _step(timings, "import_duckduckgo_search", lambda: __import__("duckduckgo_search"))
+    if GEMINI_API_KEY:
+        _step(timings, "gemini_client", gemini_model)
+    hosts = UPSTREAM_HOSTS + (["https://gnews.io/"] if NEWSAPI_KEY else [])
+    for url in hosts:
+        _step(timings, f"connect {url}", lambda url=url: http_session().head(url, timeout=5))
+    state["warmed_up"] = True
+    state["timings"] = timings
+    return timings
@@ -0,0 +1,344 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import metrics
+from .agent import research_company, generate_account_plan, plan_inputs_digest
+from .companies import aliases
+from .research_store import research_store
+from .response_cache import response_cache
+from .config import (WATCHLIST_FILE, WATCHLIST_INTERVAL_SECONDS, WATCHLIST_OFFPEAK_HOURS, WATCHLIST_MAX_AGE_SECONDS,
+                     WATCHLIST_CONCURRENCY, WATCHLIST_TICK_SECONDS, WATCHLIST_PREGENERATE_PLANS,
+                     WATCHLIST_RESEARCH_WAIT_SECONDS)
+
+
+def parse_hours(spec):
+    """[(start, end)] local-hour windows from "22-6" or "0-7,20-24"; an empty spec means any hour"""
+    windows = []
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        if start.strip() and end.strip():
+            windows.append((int(start) % 24, int(end) % 24 or 24))
+    return windows
+
+
+def in_windows(windows, hour):
+    if not windows:
+        return True
+    for start, end in windows:
+        if start < end and start <= hour < end:
+            return True
+        if start > end and (hour >= start or hour < end):
+            return True  # window wraps past midnight
+    return False
+
+
+def _article_key(article):
+    return article.url or article.title
+
+
+def diff_news(old_record, new_record):
+    """Articles added and removed between two research records, keyed by URL (or title)"""
+    old_keys = {_article_key(a) for a in old_record.articles} if old_record is not None else set()
+    new_keys = {_article_key(a) for a in new_record.articles}
+    return {
+        "added": [a.title for a in new_record.articles if _article_key(a) not in old_keys],
+        "removed": len(old_keys - new_keys)
+    }
+
+
+def _usable(data):
+    """False when every source failed, so a bad refresh never replaces good research"""
+    return "error" not in data.get("wikipedia", {}) or bool(data.get("duckduckgo", {}).get("results"))
+
+
+class WatchedCompany:
+    __slots__ = ("name", "company_id", "interval", "fetch_news", "added_at", "last_refresh", "last_result",
+                 "last_error", "news_changes", "plan", "plan_digest", "plan_version", "derived_version", "future",
+                 "researched")
+
+    def __init__(self, name, interval, fetch_news):
+        self.name = name
+        self.company_id = aliases.resolve(name)
+        self.interval = interval
+        self.fetch_news = fetch_news
+        self.added_at = time.time()
+        self.last_refresh = None
+        self.last_result = None
+        self.last_error = None
+        self.news_changes = None
+        self.plan = None
+        self.plan_digest = None
+        self.plan_version = None
+        # Research version the plan was last derived (or attempted) from
+        self.derived_version = None
+        self.future = None
+        # Set once the running refresh has stored its research, before any plan is generated
+        self.researched = threading.Event()
+
+    def to_dict(self):
+        entry = research_store.by_id(self.company_id)
+        return {
+            "company": self.name,
+            "company_id": self.company_id,
+            "interval_seconds": self.interval,
+            "fetch_news": self.fetch_news,
+            "fetched_at": entry.fetched_at if entry is not None else None,
+            "version": entry.version if entry is not None else None,
+            "last_refresh": self.last_refresh,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+            "news_changes": self.news_changes,
+            "plan_ready": entry is not None and self.plan is not None and self.plan_version == entry.version,
+            "refreshing": self.future is not None
+        }
+
+
+class Watchlist:
+    """Key accounts whose research is refreshed in the background.
+
+    A scheduler thread wakes every tick and refreshes companies whose stored
+    research is older than their interval, but only inside the off-peak
+    hours unless the research is missing or older than max_age. At most
+    `concurrency` refreshes run at once. Each refresh diffs the news against
+    the stored research; the stored entry (and the chat responses cached
+    against it) only changes when the content did, and the pre-generated
+    account plan is only regenerated when the plan prompt inputs changed.
+    """
+
+    def __init__(self, path=WATCHLIST_FILE, interval=WATCHLIST_INTERVAL_SECONDS, offpeak=WATCHLIST_OFFPEAK_HOURS,
+                 max_age=WATCHLIST_MAX_AGE_SECONDS, concurrency=WATCHLIST_CONCURRENCY, tick=WATCHLIST_TICK_SECONDS,
+                 pregenerate_plans=WATCHLIST_PREGENERATE_PLANS):
+        self.path = path
+        self.interval = interval
+        self.windows = parse_hours(offpeak)
+        self.max_age = max_age
+        self.concurrency = max(1, concurrency)
+        self.tick = tick
+        self.pregenerate_plans = pregenerate_plans
+        self.companies = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="watchlist")
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            for item in stored.get("companies", []):
+                watched = WatchedCompany(item["company"], item.get("interval_seconds", interval), item.get("fetch_news", True))
+                self.companies[watched.company_id] = watched
+
+    def save(self):
+        with self.lock:
+            data = {"companies": [
+                {"company": w.name, "interval_seconds": w.interval, "fetch_news": w.fetch_news}
+                for w in self.companies.values()
+            ]}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def add(self, company, interval=None, fetch_news=True):
+        watched = WatchedCompany(company, interval or self.interval, fetch_news)
+        with self.lock:
+            current = self.companies.get(watched.company_id)
+            if current is not None:
+                current.interval, current.fetch_news = watched.interval, fetch_news
+                watched = current
+            else:
+                self.companies[watched.company_id] = watched
+        if self.path:
+            self.save()
+        self.wakeup.set()
+        return watched
+
+    def remove(self, company):
+        with self.lock:
+            removed = self.companies.pop(aliases.resolve(company), None) is not None
+        if removed and self.path:
+            self.save()
+        return removed
+
+    def get(self, company):
+        """Watched entry for any name variant of a company, or None"""
+        return self.companies.get(aliases.resolve(company))
+
+    def __contains__(self, company):
+        return self.get(company) is not None
+
+    def __len__(self):
+        return len(self.companies)
+
+    def cached_research(self, company, wait=WATCHLIST_RESEARCH_WAIT_SECONDS):
+        """(company_id, stored research) for a watched company.
+
+        When the first refresh is running, waits up to `wait` seconds for
+        its research (not for the plan generated after it). Returns
+        (None, None) for companies that are not watched or have no
+        research yet.
+        """
+        return self._cached(company, time.monotonic() + wait)
+
+    def cached_research_many(self, companies, wait=WATCHLIST_RESEARCH_WAIT_SECONDS):
+        """{company: (company_id, stored research)} as cached_research, with one `wait` shared by all of them"""
+        deadline = time.monotonic() + wait
+        return {company: self._cached(company, deadline) for company in companies}
+
+    def _cached(self, company, deadline):
+        watched = self.get(company)
+        if watched is None:
+            return None, None
+        entry = research_store.by_id(watched.company_id)
+        with self.lock:
+            refreshing = watched.future is not None
+            researched = watched.researched
+        if entry is None and refreshing:
+            researched.wait(max(0.0, deadline - time.monotonic()))
+            entry = research_store.by_id(watched.company_id)
+        metrics.cache_lookup("watchlist", entry is not None)
+        if entry is None:
+            return None, None
+        return watched.company_id, entry
+
+    def cached_plan(self, research_id):
+        """Pre-generated plan for the current research of a watched company, or None"""
+        watched = self.companies.get(research_id)
+        entry = research_store.by_id(research_id)
+        if watched is None or entry is None or watched.plan is None or watched.plan_version != entry.version:
+            return None
+        return watched.plan
+
+    def _due(self, watched, now, offpeak):
+        """"research", "plan" or None: what a watched company needs right now"""
+        entry = research_store.by_id(watched.company_id)
+        if entry is None or now - entry.fetched_at >= self.max_age:
+            return "research"
+        if now - entry.fetched_at >= watched.interval:
+            return "research" if offpeak else None
+        if self.pregenerate_plans and watched.derived_version != entry.version:
+            return "plan" if offpeak else None
+        return None
+
+    def _derive(self, watched, entry):
+        """Regenerate the account plan only when its prompt inputs changed"""
+        if not self.pregenerate_plans:
+            return
+        watched.derived_version = entry.version
+        data = entry.data
+        digest = plan_inputs_digest(watched.name, data)
+        if digest == watched.plan_digest and watched.plan is not None:
+            watched.plan_version = entry.version
+            metrics.WATCHLIST_PLANS.inc(result="unchanged")
+            return
+        plan = generate_account_plan(watched.name, data)
+        if "error" in plan:
+            watched.last_error = plan["error"]
+            metrics.WATCHLIST_PLANS.inc(result="failed")
+            return
+        watched.plan, watched.plan_digest, watched.plan_version = plan, digest, entry.version
+        metrics.WATCHLIST_PLANS.inc(result="generated")
+
+    def refresh(self, watched, research=True):
+        """Refresh one watched company now; returns "changed", "unchanged" or "failed" """
+        try:
+            entry = research_store.by_id(watched.company_id)
+            result = "unchanged"
+            if research or entry is None:
+                previous = entry
+                fetched = research_company(watched.name, watched.fetch_news)
+                if not _usable(fetched["data"]):
+                    raise RuntimeError("all research sources failed")
+                if fetched["company_id"] != watched.company_id:
+                    # The first refresh learns the Wikipedia title the name resolves to
+                    with self.lock:
+                        self.companies.pop(watched.company_id, None)
+                        watched.company_id = fetched["company_id"]
+                        self.companies[watched.company_id] = watched
+                    previous = research_store.by_id(watched.company_id)
+                entry = research_store.put(watched.company_id, fetched["data"], watched.name)
+                changed = previous is None or entry.version != previous.version
+                watched.news_changes = diff_news(previous.record() if previous is not None else None, entry.record())
+                if changed and previous is not None and response_cache is not None:
+                    response_cache.invalidate(watched.company_id)
+                result = "changed" if changed else "unchanged"
+                watched.last_refresh = time.time()
+                watched.last_result = result
+                metrics.WATCHLIST_REFRESHES.inc(result=result)
+            watched.last_error = None
+            watched.researched.set()
+            self._derive(watched, entry)
+            return result
+        except Exception as e:
+            watched.last_result = "failed"
+            watched.last_error = str(e)
+            metrics.WATCHLIST_REFRESHES.inc(result="failed")
+            return "failed"
+
+    def _run(self, watched, research):
+        try:
+            return self.refresh(watched, research)
+        finally:
+            with self.lock:
+                watched.future = None
+            watched.researched.set()
+            self.wakeup.set()
+
+    def _submit(self, watched, research):
+        # Held until future is assigned, so _run cannot clear it first
+        with self.lock:
+            watched.researched = threading.Event()
+            watched.future = self.executor.submit(self._run, watched, research)
+
+    def schedule(self, now=None):
+        """Start refreshes for due companies within the concurrency budget; returns how many started"""
+        now = time.time() if now is None else now
+        offpeak = in_windows(self.windows, time.localtime(now).tm_hour)
+        with self.lock:
+            watched_companies = list(self.companies.values())
+        running = sum(1 for w in watched_companies if w.future is not None)
+        started = 0
+        # Companies with missing or oldest research go first
+        for watched in sorted(watched_companies, key=lambda w: w.last_refresh or 0):
+            if running + started >= self.concurrency:
+                break
+            if watched.future is not None:
+                continue
+            need = self._due(watched, now, offpeak)
+            if need is not None:
+                self._submit(watched, need == "research")
+                started += 1
+        return started
+
+    def refresh_now(self, company):
+        """Queue an immediate refresh outside the schedule; returns the watched entry or None"""
+        watched = self.get(company)
+        if watched is not None and watched.future is None:
+            self._submit(watched, True)
+        return watched
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            try:
+                self.schedule()
+            except Exception as e:
+                metrics.WATCHLIST_SCHEDULER_ERRORS.inc()
+                print(f"Watchlist scheduler error: {e}")
+            self.wakeup.wait(self.tick)
+            self.wakeup.clear()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._loop, name="watchlist-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+        self.executor.shutdown(wait=False)
+
+
+watchlist = Watchlist()
@@ -0,0 +1,64 @@
+"""Intent classifier check and micro-benchmark.
+
+Verifies frontend/intent.py against the labeled prompts in
+intent_corpus.jsonl (exit code 1 on any mismatch), then reports the mean
+classification time per prompt, also with every keyword list padded to
+simulate growth.
+
+Run from the repository root:  python benchmarks/intent_bench.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "frontend"))
+import intent  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "intent_corpus.jsonl")
+
+
+def load_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(corpus):
+    failures = 0
+    for case in corpus:
+        got = intent.classify(case["prompt"], case["current_company"])
+        expected = (case["is_account_plan"], case["is_research"], case["company"])
+        if tuple(got) != expected:
+            failures += 1
+            print(f"MISMATCH {case['prompt']!r}: expected {expected}, got {tuple(got)}")
+    return failures
+
+
+def time_per_prompt(corpus, rounds=300):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case in corpus:
+            intent.classify(case["prompt"], case["current_company"])
+    return (time.perf_counter() - start) / (rounds * len(corpus)) * 1e6
+
+
+def with_grown_keywords(extra):
+    """Recompile the matchers with `extra` filler phrases added to each list"""
+    filler = tuple(f"zq{i} phrase" for i in range(extra))
+    intent._has_research_keyword = intent._contains_any(intent.RESEARCH_KEYWORDS + filler)
+    intent._has_plan_keyword = intent._contains_any(intent.PLAN_KEYWORDS + filler)
+    intent._has_vague_phrase = intent._contains_any(intent.VAGUE_PHRASES + filler)
+    intent._has_gibberish_pattern = intent._contains_any(intent.GIBBERISH_PATTERNS + filler)
+    intent._has_meaningless_phrase = intent._contains_any(intent.MEANINGLESS_PHRASES + filler)
+    intent._word_is_gibberish.cache_clear()
+
+
+if __name__ == "__main__":
+    corpus = load_corpus()
+    failures = check(corpus)
+    print(f"{len(corpus) - failures}/{len(corpus)} labeled prompts match")
+    print(f"classify: {time_per_prompt(corpus):.1f} us/prompt")
+    for extra in (100, 1000):
+        with_grown_keywords(extra)
+        print(f"classify with +{extra} phrases per list: {time_per_prompt(corpus):.1f} us/prompt")
+    sys.exit(1 if failures else 0)
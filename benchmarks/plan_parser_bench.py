@@ -0,0 +1,118 @@
+"""Account plan parser check and benchmark.
+
+Generates synthetic plans of increasing size, checks that backend/plan_parser
+gives the same sections as the previous line-by-line parser (kept below as
+legacy_parse, exit code 1 on any difference), and reports:
+
+  - whole-text parse time for both parsers
+  - streaming parse time when the text arrives in small chunks
+  - how far into the stream the first section is emitted
+
+Run from the repository root:  python benchmarks/plan_parser_bench.py [lines per section]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend import plan_parser  # noqa: E402
+
+HEADERS = [
+    "## EXECUTIVE SUMMARY:", "**Company Overview**", "KEY CONTACTS:",
+    "STRENGTHS & WEAKNESSES:", "Opportunities and Risks", "ENGAGEMENT PLAN:"
+]
+# Gemini streams a few hundred characters per chunk
+CHUNK = 256
+WORDS = ("revenue growth market cloud partner strategy risks strengths contract customer "
+         "pipeline margin platform expansion region product team budget").split()
+
+
+def legacy_parse(full_plan_text):
+    """The parser plan_parser replaced, for comparison"""
+    sections = {key: "" for key in plan_parser.SECTION_KEYS}
+    current_section = None
+    for line in full_plan_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if "EXECUTIVE SUMMARY" in line.upper():
+            current_section = "executive_summary"
+            continue
+        elif "COMPANY OVERVIEW" in line.upper():
+            current_section = "company_overview"
+            continue
+        elif "KEY CONTACTS" in line.upper():
+            current_section = "key_contacts"
+            continue
+        elif "STRENGTHS" in line.upper() and "WEAKNESSES" in line.upper():
+            current_section = "strengths_weaknesses"
+            continue
+        elif "OPPORTUNITIES" in line.upper() and "RISKS" in line.upper():
+            current_section = "opportunities_risks"
+            continue
+        elif "ENGAGEMENT PLAN" in line.upper():
+            current_section = "engagement_plan"
+            continue
+        if current_section and line:
+            sections[current_section] += line + "\n"
+    for section in sections:
+        sections[section] = sections[section].strip()
+        if not sections[section]:
+            sections[section] = plan_parser.placeholder(section)
+    return sections
+
+
+def synthetic_plan(lines_per_section, rng):
+    out = ["Here is the account plan.", ""]
+    for header in HEADERS:
+        out.append(header)
+        for _ in range(lines_per_section):
+            line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 18)))
+            if rng.random() < 0.05:
+                line = "- " + line.upper()  # bullet that mentions RISKS or STRENGTHS on its own
+            out.append(line if rng.random() > 0.1 else "")
+        out.append("")
+    return "\n".join(out)
+
+
+def best_of(fn, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def stream(text, chunk_size):
+    parser = plan_parser.PlanParser()
+    first_at = None
+    for offset in range(0, len(text), chunk_size):
+        if parser.feed(text[offset:offset + chunk_size]) and first_at is None:
+            first_at = offset + chunk_size
+    parser.close()
+    return parser.sections(), first_at
+
+
+def main():
+    rng = random.Random(7)
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [20, 500, 5000]
+    failures = 0
+    for lines_per_section in sizes:
+        text = synthetic_plan(lines_per_section, rng)
+        expected = legacy_parse(text)
+        streamed, first_at = stream(text, CHUNK)
+        if plan_parser.parse(text) != expected or streamed != expected:
+            failures += 1
+            print(f"MISMATCH at {lines_per_section} lines per section")
+        legacy = best_of(lambda: legacy_parse(text))
+        whole = best_of(lambda: plan_parser.parse(text))
+        chunked = best_of(lambda: stream(text, CHUNK))
+        print(f"{len(text) / 1e6:7.2f} MB  legacy {legacy * 1e3:8.2f} ms  parse {whole * 1e3:8.2f} ms  "
+              f"streamed({CHUNK}B) {chunked * 1e3:8.2f} ms  first section after {first_at / len(text):.0%} of input")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Memory used per cached company by research records.
+
+Builds synthetic research results shaped like the real upstream responses
+(Wikipedia summary, 5 DuckDuckGo results, 10 GNews articles with content,
+image and source objects) and measures with tracemalloc the bytes held per
+company as:
+
+  - raw nested dicts, as research_company() returns them
+  - compact ResearchRecord objects (hot entries)
+  - zlib-packed records (cold entries)
+
+and the time to unpack a cold entry on its next read. The synthetic text
+uses a small vocabulary, so the cold ratio is better than real news gives.
+
+Run from the repository root:  python benchmarks/research_memory_bench.py [companies]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend import records  # noqa: E402
+
+WORDS = ("company revenue growth market cloud partner strategy contract customer quarter "
+         "platform expansion region product launch deal analysts shares profit").split()
+OUTLETS = ["Reuters", "Bloomberg", "CNBC", "The Verge", "TechCrunch", "Financial Times", "Forbes", "BBC News"]
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def raw_research(i, rng):
+    name = f"Company {i}"
+    articles = []
+    for j in range(10):
+        outlet = rng.choice(OUTLETS)
+        articles.append({
+            "title": sentence(rng, 10),
+            "description": sentence(rng, 30),
+            "content": " ".join(sentence(rng, 15) for _ in range(12)) + f" ... [{rng.randint(1000, 9000)} chars]",
+            "url": f"https://news.example.com/{i}/{j}",
+            "image": f"https://images.example.com/{i}/{j}.jpg",
+            "publishedAt": "2026-10-01T12:00:00Z",
+            "source": {"name": outlet, "url": f"https://{outlet.replace(' ', '').lower()}.com"}
+        })
+    data = {
+        "wikipedia": {"source": "wikipedia", "title": name, "summary": sentence(rng, 80)[:500] + "...",
+                      "url": f"https://en.wikipedia.org/wiki/Company_{i}"},
+        "duckduckgo": {"source": "duckduckgo", "results": [
+            {"title": sentence(rng, 6), "href": f"https://example.com/{i}/{k}", "body": sentence(rng, 35)}
+            for k in range(5)
+        ]},
+        "news": {"source": "news", "articles": articles}
+    }
+    # Round-trip so every string is a separate object, like parsed API responses
+    return json.loads(json.dumps(data))
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(3)
+    raw = [raw_research(i, rng) for i in range(count)]
+    raw_json = [json.dumps(data) for data in raw]
+
+    _, raw_bytes = measure(lambda: [json.loads(text) for text in raw_json])
+    hot, hot_bytes = measure(lambda: [records.ResearchRecord.from_data(json.loads(text)) for text in raw_json])
+    cold, cold_bytes = measure(lambda: [records.pack(record) for record in hot])
+
+    start = time.perf_counter()
+    for blob in cold:
+        records.unpack(blob)
+    unpack_us = (time.perf_counter() - start) / count * 1e6
+
+    print(f"{count} companies")
+    print(f"raw dicts       {raw_bytes / count:10,.0f} bytes/company")
+    print(f"records (hot)   {hot_bytes / count:10,.0f} bytes/company  ({raw_bytes / hot_bytes:.1f}x smaller)")
+    print(f"packed (cold)   {cold_bytes / count:10,.0f} bytes/company  ({raw_bytes / cold_bytes:.1f}x smaller)")
+    print(f"unpack on read  {unpack_us:10,.0f} us/company")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Company resolver benchmark.
+
+Indexes the bundled known-company list plus N synthetic company names,
+then looks up misspelled variants (one or two random edits) and reports
+build time, index size, lookup latency and top-1 accuracy.
+
+Run from the repository root:  python benchmarks/resolver_bench.py [N]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from backend.resolver import CompanyResolver, load_known_companies  # noqa: E402
+
+CONSONANTS = "bcdfghjklmnprstvwxz"
+VOWELS = "aeiou"
+SUFFIXES = ["", "", " Systems", " Labs", " Group", " Energy", " Bank", " Foods", " Motors", " Health"]
+
+
+def synthetic_names(n, rng):
+    names = set()
+    while len(names) < n:
+        word = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(("", "", rng.choice(CONSONANTS)))
+                       for _ in range(rng.randint(2, 4)))
+        names.add(word.capitalize() + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def misspell(name, rng, edits):
+    chars = list(name.lower())
+    for _ in range(edits):
+        i = rng.randrange(1, len(chars) - 1)
+        op = rng.choice(("delete", "insert", "replace", "transpose"))
+        if op == "delete":
+            del chars[i]
+        elif op == "insert":
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif op == "replace":
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars[i], chars[i - 1] = chars[i - 1], chars[i]
+    return "".join(chars)
+
+
+def main(n=30000, queries=2000, seed=7):
+    rng = random.Random(seed)
+    names = synthetic_names(n, rng)
+
+    start = time.perf_counter()
+    resolver = CompanyResolver()
+    load_known_companies(resolver)
+    for name in names:
+        resolver.add(name)
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    correct = 0
+    for _ in range(queries):
+        name = rng.choice(names)
+        query = misspell(name, rng, rng.choice((1, 2)))
+        start = time.perf_counter()
+        candidates = resolver.lookup(query, limit=5)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        if candidates and candidates[0]["name"] == name:
+            correct += 1
+
+    latencies.sort()
+    print(f"names indexed:   {len(resolver)}")
+    print(f"delete keys:     {len(resolver.index)}")
+    print(f"build time:      {build_s:.2f} s")
+    print(f"lookup mean:     {statistics.mean(latencies):.0f} us")
+    print(f"lookup p50/p99:  {latencies[len(latencies) // 2]:.0f} / {latencies[int(len(latencies) * 0.99)]:.0f} us")
+    print(f"top-1 accuracy:  {correct / queries:.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)
@@ -0,0 +1,66 @@
+"""Cold-start benchmark for the backend.
+
+Starts uvicorn once with deferred imports only and once with
+WARMUP_ON_STARTUP=true, and reports import time, time until /health answers
+and the latency of the first and second /api/research calls.
+
+Run from the repository root:  python benchmarks/startup_bench.py [company]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+PORT = 8765
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+def import_time(env):
+    code = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def post(path, payload):
+    req = urllib.request.Request(BASE + path, data=json.dumps(payload).encode(),
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=180) as r:
+        r.read()
+    return time.perf_counter() - start
+
+
+def run(label, warmup, company):
+    env = dict(os.environ, WARMUP_ON_STARTUP="true" if warmup else "false")
+    result = {"mode": label, "import_s": import_time(env)}
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(PORT)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(BASE + "/health", timeout=1).read()
+                break
+            except OSError:
+                if time.perf_counter() - start > 120:
+                    raise RuntimeError("backend did not start")
+                time.sleep(0.05)
+        result["ready_s"] = time.perf_counter() - start
+        body = {"company": company, "fetch_news": False}
+        result["first_request_s"] = post("/api/research", body)
+        result["second_request_s"] = post("/api/research", body)
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+
+if __name__ == "__main__":
+    company = sys.argv[1] if len(sys.argv) > 1 else "Microsoft"
+    print(f"{'mode':<8} {'import':>8} {'ready':>8} {'1st req':>8} {'2nd req':>8}")
+    for label, warmup in (("lazy", False), ("warm", True)):
+        r = run(label, warmup, company)
+        print(f"{r['mode']:<8} {r['import_s']:>8.3f} {r['ready_s']:>8.3f} "
+              f"{r['first_request_s']:>8.3f} {r['second_request_s']:>8.3f}")
@@ -0,0 +1,109 @@
+"""Throughput of batch transcription of recorded call notes.
+
+Transcribes a set of WAV clips with frontend/transcription.py, first on one
+worker (what transcribing on the Streamlit script thread amounts to) and
+then on a pool, and reports clips per second and audio seconds processed
+per wall-clock second. A last pass resubmits the same clips to time the
+transcript cache.
+
+Without a clip directory, synthetic 16 kHz mono clips are generated (tone
+bursts, so recognizers return "not understood", but every clip still goes
+through decoding, chunking and recognition). Pass a directory of real WAV
+recordings for meaningful accuracy. The default engine is the offline
+Sphinx engine (pip install SpeechRecognition pocketsphinx) so the numbers
+do not depend on the network.
+
+Run from the repository root:
+  python benchmarks/transcription_bench.py [wav_dir|clip_count] [engine] [workers]
+"""
+import io
+import math
+import os
+import random
+import struct
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "frontend"))
+from transcription import TranscriptionService  # noqa: E402
+
+RATE = 16000
+
+
+def synthetic_clip(rng, seconds):
+    """16-bit mono WAV bytes with speech-like bursts of tones and pauses"""
+    frames = bytearray()
+    t = 0
+    total = int(seconds * RATE)
+    while t < total:
+        burst = int(rng.uniform(0.15, 0.6) * RATE)
+        pitch = rng.uniform(110, 320)
+        loud = rng.random() > 0.3
+        for i in range(min(burst, total - t)):
+            value = 0.0
+            if loud:
+                value = 0.4 * math.sin(2 * math.pi * pitch * i / RATE) + 0.2 * math.sin(2 * math.pi * 2.7 * pitch * i / RATE)
+            value += rng.uniform(-0.02, 0.02)
+            frames += struct.pack("<h", int(value * 32767))
+        t += burst
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        out.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def load_clips(arg):
+    if arg and os.path.isdir(arg):
+        names = sorted(name for name in os.listdir(arg) if name.lower().endswith(".wav"))
+        clips = []
+        for name in names:
+            with open(os.path.join(arg, name), "rb") as f:
+                clips.append(f.read())
+        return clips
+    rng = random.Random(7)
+    count = int(arg) if arg else 12
+    return [synthetic_clip(rng, rng.uniform(8, 40)) for _ in range(count)]
+
+
+def duration(clip):
+    with wave.open(io.BytesIO(clip)) as source:
+        return source.getnframes() / source.getframerate()
+
+
+def run(service, clips):
+    start = time.perf_counter()
+    results = [future.result() for future in service.transcribe_batch(clips)]
+    return time.perf_counter() - start, results
+
+
+def main():
+    clips = load_clips(sys.argv[1] if len(sys.argv) > 1 else None)
+    engine = sys.argv[2] if len(sys.argv) > 2 else "sphinx"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else min(8, os.cpu_count() or 2)
+    if not clips:
+        sys.exit("no WAV clips found")
+
+    audio_seconds = sum(duration(clip) for clip in clips)
+    print(f"{len(clips)} clips, {audio_seconds:.0f} s of audio, engine={engine}")
+    for label, pool_size in (("1 worker", 1), (f"{workers} workers", workers)):
+        # A fresh service per run so nothing comes from the transcript cache
+        service = TranscriptionService(engine=engine, workers=pool_size)
+        elapsed, results = run(service, clips)
+        errors = [r["error"] for r in results if "error" in r]
+        if len(errors) == len(results) and errors[0].startswith("Voice input needs"):
+            sys.exit(errors[0])
+        print(f"{label:12} {elapsed:8.2f} s  {len(clips) / elapsed:6.2f} clips/s  {audio_seconds / elapsed:6.1f}x realtime  "
+              f"({len(results) - len(errors)} transcribed, {len(errors)} not understood/failed)")
+
+    cached = TranscriptionService(engine=engine, workers=workers)
+    run(cached, clips)
+    elapsed, _ = run(cached, clips)
+    print(f"{'cached':12} {elapsed * 1000:8.2f} ms for the same clips (only transcribed clips are cached)")
+
+
+if __name__ == "__main__":
+    main()
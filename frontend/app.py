@@ -1,18 +1,63 @@
 import streamlit as st
-import requests
 import os
-import base64
+import time
 import json
-import speech_recognition as sr
-import pyttsx3
-import threading
+import hashlib
+import importlib.util
 import queue
 import tempfile
 from io import BytesIO
-import re
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
+from backend_client import BackendClient, CHAT_TIMEOUT, busy_message
+from intent import classify
+from transcription import UPLOAD_TYPES
 
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000')
 
+# One pooled keep-alive client per Streamlit server, shared by all sessions
+@st.cache_resource
+def get_backend():
+    return BackendClient(BACKEND_URL)
+
+backend = get_backend()
+
+EXPORT_FORMATS = {"docx": "DOCX", "pdf": "PDF", "md": "Markdown"}
+PLAN_SECTIONS = {
+    'executive_summary': 'Executive Summary',
+    'company_overview': 'Company Overview',
+    'key_contacts': 'Key Contacts',
+    'strengths_weaknesses': 'Strengths & Weaknesses',
+    'opportunities_risks': 'Opportunities & Risks',
+    'engagement_plan': 'Engagement Plan'
+}
+
+def wait_for(future, placeholder, message):
+    """Wait for a background request while keeping the placeholder ticking"""
+    start = time.monotonic()
+    while True:
+        try:
+            return future.result(timeout=0.5)
+        except FutureTimeout:
+            placeholder.markdown(f"{message} ({time.monotonic() - start:.0f}s)")
+
+def follow_plan(future, events, placeholder, message):
+    """Show account plan sections as they stream in; returns the plan or an {"error"} dict"""
+    sections = {}
+    while True:
+        try:
+            event = events.get(timeout=0.5)
+        except queue.Empty:
+            # Sections are queued before the future completes, so nothing is left behind
+            if future.done():
+                return future.result()
+            continue
+        sections[event["section"]] = event["content"]
+        received = "".join(
+            f"\n\n### {PLAN_SECTIONS[key]}\n{content}" for key, content in sections.items() if key in PLAN_SECTIONS
+        )
+        placeholder.markdown(f"{message}{received}")
+
 st.set_page_config(
     page_title='Company Research Assistant',
     page_icon='💼',
@@ -22,13 +67,38 @@ st.set_page_config(
 st.title('💼 Company Research Assistant')
 
 # Initialize session state
+# Chat history rendering is windowed: only the newest messages are drawn on
+# each rerun, older ones behind a "show earlier" button
+CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', '20'))
+# Oldest messages beyond this are dropped from the browser session; the
+# backend session keeps its own bounded log for chat context
+MAX_CHAT_MESSAGES = int(os.getenv('MAX_CHAT_MESSAGES', '500'))
+WELCOME_MESSAGE = "Hi! I'm your Company Research Assistant. I can help you research any company and generate editable account plans. Just tell me which company you'd like to research!"
+
+def add_message(role, content):
+    """Append a chat message with a stable id (used for widget keys)"""
+    st.session_state.messages.append({
+        "id": st.session_state.next_message_id,
+        "role": role,
+        "content": content
+    })
+    st.session_state.next_message_id += 1
+    overflow = len(st.session_state.messages) - MAX_CHAT_MESSAGES
+    if overflow > 0:
+        for message in st.session_state.messages[:overflow]:
+            st.session_state.audio_requests.pop(message["id"], None)
+        del st.session_state.messages[:overflow]
+    return st.session_state.next_message_id - 1
+
+def reset_messages():
+    st.session_state.messages = []
+    st.session_state.next_message_id = 0
+    st.session_state.audio_requests = {}
+    st.session_state.visible_messages = CHAT_PAGE_SIZE
+    add_message("assistant", WELCOME_MESSAGE)
+
 if 'messages' not in st.session_state:
-    st.session_state.messages = [
-        {
-            "role": "assistant",
-            "content": "Hi! I'm your Company Research Assistant. I can help you research any company and generate editable account plans. Just tell me which company you'd like to research!"
-        }
-    ]
+    reset_messages()
 
 if 'research_in_progress' not in st.session_state:
     st.session_state.research_in_progress = False
@@ -42,278 +112,163 @@ if 'account_plan' not in st.session_state:
 if 'show_account_plan' not in st.session_state:
     st.session_state.show_account_plan = False
 
-if 'research_data' not in st.session_state:
-    st.session_state.research_data = None
+# Research payloads stay on the backend; plans refer to them by id
+if 'research_id' not in st.session_state:
+    st.session_state.research_id = None
+
+# Pending microphone transcription (a Future) and transcribed call notes
+if 'voice_request' not in st.session_state:
+    st.session_state.voice_request = None
 
-if 'listening' not in st.session_state:
-    st.session_state.listening = False
+if 'note_requests' not in st.session_state:
+    st.session_state.note_requests = {}
 
 if 'voice_input' not in st.session_state:
     st.session_state.voice_input = ""
 
-# Initialize text-to-speech engine
-@st.cache_resource
-def init_tts():
-    try:
-        engine = pyttsx3.init()
-        # Configure voice settings
-        voices = engine.getProperty('voices')
-        if voices:
-            engine.setProperty('voice', voices[0].id)  # Use first available voice
-        engine.setProperty('rate', 150)  # Speed of speech
-        engine.setProperty('volume', 0.8)  # Volume level
-        return engine
-    except:
-        return None
-
-tts_engine = init_tts()
-
-def speak_text(text):
-    """Convert text to speech in a separate thread"""
-    if tts_engine:
-        def speak():
-            try:
-                tts_engine.say(text)
-                tts_engine.runAndWait()
-            except Exception as e:
-                print(f"TTS error: {e}")
-        
-        thread = threading.Thread(target=speak)
-        thread.daemon = True
-        thread.start()
+# Conversation history lives on the backend; chat turns only send the new message
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-def transcribe_audio():
-    """Transcribe speech to text using microphone"""
+def sync_session_messages(messages):
+    """Record messages that did not go through /api/chat in the backend session log"""
     try:
-        recognizer = sr.Recognizer()
-        microphone = sr.Microphone()
-        
-        with microphone as source:
-            st.info("🎤 Listening... Speak now!")
-            recognizer.adjust_for_ambient_noise(source)
-            audio = recognizer.listen(source, timeout=10, phrase_time_limit=15)
-        
-        try:
-            text = recognizer.recognize_google(audio)
-            return text
-        except sr.UnknownValueError:
-            return "Sorry, I couldn't understand the audio."
-        except sr.RequestError:
-            return "Sorry, there was an error with the speech recognition service."
-            
+        backend.post(
+            f"/api/sessions/{st.session_state.session_id}/messages",
+            json={"messages": [{"role": m["role"], "content": m["content"]} for m in messages]}
+        )
     except Exception as e:
-        return f"Error with microphone: {str(e)}"
+        print(f"Session sync error: {e}")
 
-def contains_gibberish(text):
-    """Check if text contains obvious gibberish patterns"""
-    text_lower = text.lower()
-    
-    # Common gibberish patterns (keyboard mashing, lorem ipsum, etc.)
-    gibberish_patterns = [
-        'asdf', 'jkl', 'qwerty', 'zxcv', 'lorem', 'ipsum', 'dolor', 'sit', 'amet',
-        'test', 'example', 'sample', 'random', 'foo', 'bar', 'baz'
-    ]
-    
-    # Check for repeating characters (like "aaaa", "jjjj", etc.)
-    if re.search(r'(.)\1{3,}', text_lower):  # 4 or more repeating characters
-        return True
-    
-    # Check for keyboard row patterns (qwerty, asdf, etc.)
-    if any(pattern in text_lower for pattern in gibberish_patterns):
-        return True
-    
-    # Check for unusual character sequences (too many consonants/vowels in a row)
-    words = text_lower.split()
-    for word in words:
-        if len(word) > 3:
-            # Check for consonant-heavy or vowel-heavy sequences
-            consonants = len(re.findall(r'[bcdfghjklmnpqrstvwxyz]', word))
-            vowels = len(re.findall(r'[aeiou]', word))
-            if consonants > vowels * 2 or vowels > consonants * 2:  # Unbalanced ratio
-                return True
-    
-    # Check for meaningless short words that aren't real words
-    common_words = ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use']
-    if len(text_lower) < 4 and text_lower not in common_words:
-        return True
-    
-    return False
+# Voice libraries are only imported when voice features are actually used
+TTS_AVAILABLE = importlib.util.find_spec("pyttsx3") is not None
 
-def is_valid_company_name(company_name):
-    """Validate if the extracted company name is likely to be a real company"""
-    company_lower = company_name.lower()
-    
-    # Check for obvious gibberish
-    if contains_gibberish(company_name):
-        return False
-    
-    # Check for meaningless phrases
-    meaningless_phrases = [
-        'from my dreams', 'from my imagination', 'my dreams', 'my imagination',
-        'something about', 'some company', 'any company', 'what were', 'were doing',
-        'cousin works', 'says coffee', 'coffee great'
-    ]
-    
-    if any(phrase in company_lower for phrase in meaningless_phrases):
-        return False
-    
-    # Check if it's too short or too long to be reasonable
-    if len(company_name) < 2 or len(company_name) > 50:
-        return False
-    
-    # Be more lenient with capitalization for single-word company names
-    words = company_name.split()
-    if len(words) == 1:
-        # Single word companies can be any capitalization
-        return True
+# Speech is rendered to cached audio files by a worker pool and played in the browser
+@st.cache_resource
+def get_tts():
+    from tts import TTSService
+    return TTSService()
+
+if 'audio_requests' not in st.session_state:
+    st.session_state.audio_requests = {}
+
+def speak_text(message_id, text):
+    """Queue audio for a message; it shows up under the message once rendered"""
+    if TTS_AVAILABLE:
+        rate = st.session_state.get('voice_rate', 150)
+        st.session_state.audio_requests[message_id] = get_tts().request(text, rate)
+        st.session_state.autoplay_message = message_id
+
+def show_audio(message_id):
+    future = st.session_state.audio_requests[message_id]
+    if not future.done():
+        wait_for_audio(message_id)
+    elif future.exception():
+        st.caption(f"🔇 Audio unavailable: {future.exception()}")
     else:
-        # For multi-word, check if most words start with capital letters
-        capitalized_words = sum(1 for word in words if word and word[0].isupper())
-        if capitalized_words < len(words) * 0.3:  # Reduced from 0.5 to 0.3
-            return False
-    
-    return True
-def is_research_request(prompt):
-    """Check if the user is requesting new research"""
-    research_keywords = [
-        'research', 'analyze', 'study', 'look up', 'find info', 
-        'tell me about', 'generate account plan', 'create account plan',
-        'make account plan', 'build account plan'
-    ]
-    
-    prompt_lower = prompt.lower()
-    
-    # Check for explicit research keywords
-    if any(keyword in prompt_lower for keyword in research_keywords):
-        return True
-    
-    # Check if it's asking about a new company we haven't researched
-    if st.session_state.current_company:
-        words = prompt_lower.split()
-        for word in words:
-            if word not in research_keywords and len(word) > 2:
-                if word != st.session_state.current_company.lower() and word.title() != st.session_state.current_company:
-                    if any(ctx in prompt_lower for ctx in ['what about', 'how about', 'can you', 'what if']):
-                        return True
-    
-    return False
-
-def extract_company_name(prompt):
-    """Extract company name from research request"""
-    research_keywords = [
-        'research', 'analyze', 'study', 'look up', 'find info', 
-        'tell me about', 'generate account plan', 'create account plan',
-        'make account plan', 'build account plan', 'account plan for',
-        'research on', 'analyze on'
-    ]
-    
-    prompt_lower = prompt.lower()
-    
-    # FIRST: Try to extract company name even from messy input
-    # Look for research patterns followed by company names
-    for keyword in research_keywords:
-        if keyword in prompt_lower:
-            # Find the position after the research keyword
-            keyword_pos = prompt_lower.find(keyword)
-            after_keyword = prompt_lower[keyword_pos + len(keyword):].strip()
-            
-            # Extract the first meaningful word(s) after research keyword
-            words_after = after_keyword.split()
-            potential_company_words = []
-            
-            for word in words_after:
-                if (word not in ['the', 'a', 'an', 'about', 'on', 'for', 'and', 'but', 'anyway'] and
-                    len(word) > 2 and not contains_gibberish(word)):
-                    potential_company_words.append(word)
-                    # Stop if we hit conversational markers
-                    if word in ['my', 'i', 'we', 'you', 'anyway', 'what', 'were']:
-                        break
-            
-            if potential_company_words:
-                company_name = ' '.join(potential_company_words).title()
-                if is_valid_company_name(company_name):
-                    return company_name
-    
-    # SECOND: Check for vague requests that need clarification
-    vague_phrases = [
-        'something about',
-        'some companies',
-        'any company', 
-        'a company',
-        'companies in general',
-        'business in general',
-        'tell me about companies',
-        'research companies'
-    ]
-    
-    # If it's a vague request without any specific company mention, return None
-    if any(phrase in prompt_lower for phrase in vague_phrases):
-        # But only if no company is mentioned
-        company_indicators = ['microsoft', 'apple', 'google', 'amazon', 'tesla', 'netflix', 
-                             'meta', 'facebook', 'ibm', 'intel', 'samsung', 'sony']
-        if not any(company in prompt_lower for company in company_indicators):
-            return None
-    
-    # THIRD: Fallback - extract company using the old method but be more lenient
-    words = prompt_lower.split()
-    
-    # Remove research keywords and common words
-    filtered_words = []
-    for word in words:
-        if (word not in research_keywords and 
-            word not in ['the', 'a', 'an', 'about', 'on', 'for', 'something', 'companies', 'business',
-                        'lorem', 'ipsum', 'from', 'my', 'dreams', 'corporation', 'company',
-                        'cousin', 'works', 'says', 'coffee', 'great', 'anyway', 'what', 'were', 'doing'] and
-            len(word) > 1 and  # Ignore single letters
-            not word.isnumeric() and  # Ignore numbers
-            not contains_gibberish(word)):  # Ignore gibberish
-            filtered_words.append(word)
-    
-    company_name = ' '.join(filtered_words).title()
-    
-    # Additional validation
-    if len(company_name.strip()) < 2:
-        return None
-    
-    # Final validation check
-    if not is_valid_company_name(company_name):
-        return None
-    
-    return company_name.strip()
-
-def is_account_plan_request(prompt):
-    """Check if user specifically wants an account plan"""
-    plan_keywords = [
-        'account plan', 'generate plan', 'create plan', 'make plan',
-        'build plan', 'business plan', 'strategy plan'
-    ]
-    return any(keyword in prompt.lower() for keyword in plan_keywords)
-
-# Voice input handling
-if st.session_state.listening:
-    with st.spinner("🎤 Listening... Speak now!"):
+        path, mime = future.result()
+        autoplay = st.session_state.get('autoplay_message') == message_id
+        st.session_state.autoplay_message = None
         try:
-            transcribed_text = transcribe_audio()
-            if transcribed_text and not transcribed_text.startswith("Sorry") and not transcribed_text.startswith("Error"):
-                st.session_state.voice_input = transcribed_text
-                st.session_state.listening = False
-                st.rerun()
-            else:
-                st.error(transcribed_text)
-                st.session_state.listening = False
-        except Exception as e:
-            st.error(f"Voice input failed: {str(e)}")
-            st.session_state.listening = False
-
-# Display chat messages
-for message in st.session_state.messages:
+            st.audio(path, format=mime, autoplay=autoplay)
+        except TypeError:
+            # Streamlit before 1.34 has no autoplay; the player is still shown
+            st.audio(path, format=mime)
+
+def _wait_for_audio(message_id):
+    if st.session_state.audio_requests[message_id].done():
+        st.rerun()
+    st.caption("🔊 Preparing audio...")
+
+# Polls without rerunning the whole script where st.fragment is available
+wait_for_audio = st.fragment(run_every=1)(_wait_for_audio) if hasattr(st, 'fragment') else _wait_for_audio
+
+# Recording and recognition run on a worker pool shared by all sessions
+@st.cache_resource
+def get_transcriber():
+    from transcription import TranscriptionService
+    return TranscriptionService()
+
+def _wait_for_voice():
+    if st.session_state.voice_request is None or st.session_state.voice_request.done():
+        st.rerun()
+    st.info("🎤 Listening... Speak now!")
+
+def _wait_for_notes():
+    futures = list(st.session_state.note_requests.values())
+    done = sum(future.done() for future in futures)
+    if done == len(futures):
+        st.rerun()
+    st.caption(f"📝 Transcribed {done} of {len(futures)} clips...")
+
+wait_for_voice = st.fragment(run_every=1)(_wait_for_voice) if hasattr(st, 'fragment') else _wait_for_voice
+wait_for_notes = st.fragment(run_every=1)(_wait_for_notes) if hasattr(st, 'fragment') else _wait_for_notes
+
+# Shorter names have too many one-edit neighbours to be corrected without asking
+AUTO_CORRECT_MIN_LENGTH = 6
+
+def resolve_company_name(company_name):
+    """Correct misspelled company names via the backend resolver.
+
+    Only a confident fix is applied: one edit away from a known name, on a
+    name long enough to be unambiguous, that is not itself a known company
+    or Wikipedia article. Other close candidates are offered instead.
+
+    Returns (name to research, original spelling if it was corrected else None,
+    suggested name or None).
+    """
+    try:
+        response = backend.get(
+            "/api/resolve",
+            params={"q": company_name, "limit": 1, "verify": "true"},
+            timeout=(3, 10)
+        )
+        resolved = response.json() if response.status_code == 200 else {}
+    except Exception:
+        return company_name, None, None
+
+    candidates = resolved.get("candidates", [])
+    if not candidates or candidates[0]["distance"] == 0 or candidates[0]["prefix"] or resolved.get("known", True):
+        return company_name, None, None
+    best = candidates[0]["name"]
+    if candidates[0]["distance"] == 1 and len(company_name.strip()) >= AUTO_CORRECT_MIN_LENGTH:
+        return best, company_name, None
+    return company_name, None, best
+
+def suggest_company(company_name):
+    """Research the suggested spelling on the next run"""
+    st.session_state.voice_input = f"Research {company_name}"
+
+# Voice input handling: the recording runs in the background, this only checks on it
+if st.session_state.voice_request is not None:
+    if st.session_state.voice_request.done():
+        result = st.session_state.voice_request.result()
+        st.session_state.voice_request = None
+        if "text" in result:
+            st.session_state.voice_input = result["text"]
+        else:
+            st.error(result["error"])
+    else:
+        wait_for_voice()
+
+# Display chat messages (newest window only)
+hidden_messages = len(st.session_state.messages) - st.session_state.visible_messages
+if hidden_messages > 0:
+    if st.button(f"⬆️ Show earlier messages ({hidden_messages} hidden)", key="show_earlier_messages"):
+        st.session_state.visible_messages += CHAT_PAGE_SIZE
+        st.rerun()
+
+for message in st.session_state.messages[-st.session_state.visible_messages:]:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
         
         # Add text-to-speech button for assistant messages
-        if message["role"] == "assistant" and tts_engine:
-            if st.button("🔊 Speak", key=f"speak_{hash(message['content'])}"):
-                speak_text(message["content"])
+        if message["role"] == "assistant" and TTS_AVAILABLE:
+            if message["id"] in st.session_state.audio_requests:
+                show_audio(message["id"])
+            elif st.button("🔊 Speak", key=f"speak_{message['id']}"):
+                speak_text(message["id"], message["content"])
+                st.rerun()
 
 # Voice input section
 col1, col2 = st.columns([3, 1])
@@ -324,8 +279,8 @@ with col1:
 
 with col2:
     # Voice input button
-    if st.button("🎤 Voice Input", use_container_width=True):
-        st.session_state.listening = True
+    if st.button("🎤 Voice Input", use_container_width=True, disabled=st.session_state.voice_request is not None):
+        st.session_state.voice_request = get_transcriber().record()
         st.rerun()
 
 # Use voice input if available
@@ -335,18 +290,27 @@ if st.session_state.voice_input and not prompt:
 
 # Process input
 if prompt:
-    # Add user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    # Add user message to chat history; a new turn collapses the view back to the latest page
+    add_message("user", prompt)
+    st.session_state.visible_messages = CHAT_PAGE_SIZE
     with st.chat_message("user"):
         st.markdown(prompt)
 
     # Determine the type of request
-    should_generate_account_plan = is_account_plan_request(prompt)
-    should_do_research = is_research_request(prompt)
+    intent = classify(prompt, st.session_state.current_company)
+    should_generate_account_plan = intent.is_account_plan
+    should_do_research = intent.is_research
     
     company_to_research = None
+    corrected_from = None
+    suggestion = None
     if should_do_research:
-        company_to_research = extract_company_name(prompt)
+        company_to_research = intent.company
+        if company_to_research:
+            company_to_research, corrected_from, suggestion = resolve_company_name(company_to_research)
+
+    # Regular chat turns are logged by /api/chat itself
+    handled_by_chat = False
 
     # Generate response
     with st.chat_message("assistant"):
@@ -366,26 +330,40 @@ I'd be happy to help you research companies! To get started, I need to know whic
 Which specific company would you like me to research?
 """
             message_placeholder.markdown(clarification_response)
-            st.session_state.messages.append({"role": "assistant", "content": clarification_response})
+            add_message("assistant", clarification_response)
             
         elif should_do_research and company_to_research:
             # Start research
             st.session_state.research_in_progress = True
             st.session_state.current_company = company_to_research
             
-            message_placeholder.markdown(f"🔍 Starting research on **{company_to_research}**...")
+            if corrected_from:
+                research_status = f"🔍 Starting research on **{company_to_research}** (interpreted from \"{corrected_from}\")..."
+            else:
+                research_status = f"🔍 Starting research on **{company_to_research}**..."
+            message_placeholder.markdown(research_status)
+            if suggestion:
+                st.button(
+                    f"Did you mean {suggestion}?", key=f"suggest_{len(st.session_state.messages)}",
+                    on_click=suggest_company, args=(suggestion,)
+                )
             
             try:
-                # Call research endpoint
-                research_response = requests.post(
-                    f"{BACKEND_URL}/api/research",
-                    json={"company": company_to_research, "fetch_news": True},
-                    timeout=120
-                )
+                # Call research endpoint; when a plan was asked for, it is requested
+                # by the worker as soon as the research data comes back
+                if should_generate_account_plan:
+                    research_future, plan_future, plan_events = backend.research_and_plan(
+                        company_to_research, session_id=st.session_state.session_id
+                    )
+                else:
+                    research_future = backend.submit(
+                        backend.research, company_to_research, session_id=st.session_state.session_id
+                    )
+                research_response = wait_for(research_future, message_placeholder, research_status)
                 
                 if research_response.status_code == 200:
                     research_data = research_response.json()
-                    st.session_state.research_data = research_data["data"]
+                    st.session_state.research_id = research_data.get("research_id")
                     
                     # Show research updates
                     updates = research_data.get("updates", [])
@@ -393,24 +371,16 @@ Which specific company would you like me to research?
                     
                     # Generate account plan only if specifically requested
                     if should_generate_account_plan:
-                        message_placeholder.markdown(f"🔍 Research completed! 📊 Generating account plan...")
-                        
-                        account_plan_response = requests.post(
-                            f"{BACKEND_URL}/api/generate-account-plan",
-                            json={
-                                "company": company_to_research,
-                                "research_data": research_data["data"]
-                            }
+                        account_plan_data = follow_plan(
+                            plan_future, plan_events, message_placeholder,
+                            f"🔍 Research completed! 📊 Generating account plan...\n\n{research_updates_text}"
                         )
                         
-                        if account_plan_response.status_code == 200:
-                            account_plan_data = account_plan_response.json()
+                        if "error" not in account_plan_data:
+                            st.session_state.account_plan = account_plan_data
+                            st.session_state.show_account_plan = True
                             
-                            if "error" not in account_plan_data:
-                                st.session_state.account_plan = account_plan_data
-                                st.session_state.show_account_plan = True
-                                
-                                final_response = f"""
+                            final_response = f"""
 ## 📊 Research Complete: {company_to_research}
 
 ✅ I've generated a comprehensive account plan based on research from Wikipedia, DuckDuckGo, and GNews.
@@ -420,10 +390,8 @@ Which specific company would you like me to research?
 
 👇 **You can now review and edit the account plan below!** Each section is editable - just click on any section to modify it.
 """
-                            else:
-                                final_response = f"## 📊 Research Complete: {company_to_research}\n\n{research_updates_text}\n\n⚠️ Could not generate account plan: {account_plan_data['error']}"
                         else:
-                            final_response = f"## 📊 Research Complete: {company_to_research}\n\n{research_updates_text}\n\n⚠️ Account plan generation failed."
+                            final_response = f"## 📊 Research Complete: {company_to_research}\n\n{research_updates_text}\n\n⚠️ Could not generate account plan: {account_plan_data['error']}"
                     else:
                         # Just research, no account plan
                         final_response = f"""
@@ -438,78 +406,69 @@ You can now ask me specific questions about {company_to_research}, or say "gener
 """
                     
                     message_placeholder.markdown(final_response)
-                    st.session_state.messages.append({"role": "assistant", "content": final_response})
+                    add_message("assistant", final_response)
                     
                 else:
-                    error_msg = f"❌ Sorry, I couldn't research {company_to_research}. Please try again later."
+                    error_msg = f"❌ Sorry, I couldn't research {company_to_research}. {busy_message(research_response) or 'Please try again later.'}"
                     message_placeholder.markdown(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    add_message("assistant", error_msg)
                     
             except Exception as e:
                 error_msg = f"❌ Research error: {str(e)}"
                 message_placeholder.markdown(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                add_message("assistant", error_msg)
             
             st.session_state.research_in_progress = False
             
-        elif should_generate_account_plan and st.session_state.research_data and st.session_state.current_company:
+        elif should_generate_account_plan and st.session_state.research_id and st.session_state.current_company:
             # Generate account plan for already researched company
             message_placeholder.markdown(f"📊 Generating account plan for {st.session_state.current_company}...")
             
             try:
-                account_plan_response = requests.post(
-                    f"{BACKEND_URL}/api/generate-account-plan",
-                    json={
-                        "company": st.session_state.current_company,
-                        "research_data": st.session_state.research_data
-                    }
+                plan_future, plan_events = backend.account_plan_in_background(
+                    st.session_state.current_company, st.session_state.research_id, st.session_state.session_id
+                )
+                account_plan_data = follow_plan(
+                    plan_future, plan_events, message_placeholder,
+                    f"📊 Generating account plan for {st.session_state.current_company}..."
                 )
                 
-                if account_plan_response.status_code == 200:
-                    account_plan_data = account_plan_response.json()
+                if "error" not in account_plan_data:
+                    st.session_state.account_plan = account_plan_data
+                    st.session_state.show_account_plan = True
                     
-                    if "error" not in account_plan_data:
-                        st.session_state.account_plan = account_plan_data
-                        st.session_state.show_account_plan = True
-                        
-                        final_response = f"""
+                    final_response = f"""
 ## 📊 Account Plan Generated: {st.session_state.current_company}
 
 ✅ I've created a comprehensive account plan based on our previous research.
 
 👇 **You can now review and edit the account plan below!** Each section is editable.
 """
-                    else:
-                        final_response = f"❌ Could not generate account plan: {account_plan_data['error']}"
                 else:
-                    final_response = "❌ Account plan generation failed."
+                    final_response = f"❌ Could not generate account plan: {account_plan_data['error']}"
                 
                 message_placeholder.markdown(final_response)
-                st.session_state.messages.append({"role": "assistant", "content": final_response})
+                add_message("assistant", final_response)
                 
             except Exception as e:
                 error_msg = f"❌ Error generating account plan: {str(e)}"
                 message_placeholder.markdown(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                add_message("assistant", error_msg)
             
         else:
             # Regular chat message - no research, no account plan generation
+            handled_by_chat = True
             message_placeholder.markdown("🤔 Thinking...")
             
             try:
-                # Prepare research data for chat if we have it
-                research_data_for_chat = None
-                if st.session_state.research_data and st.session_state.current_company:
-                    research_data_for_chat = st.session_state.research_data
-                    research_data_for_chat["company"] = st.session_state.current_company
-                
-                chat_response = requests.post(
-                    f"{BACKEND_URL}/api/chat",
+                chat_response = backend.post(
+                    "/api/chat",
                     json={
                         "message": prompt,
-                        "conversation_history": st.session_state.messages
+                        "session_id": st.session_state.session_id
                     },
-                    timeout=60
+                    timeout=CHAT_TIMEOUT,
+                    session_id=st.session_state.session_id
                 )
                 
                 if chat_response.status_code == 200:
@@ -521,21 +480,27 @@ You can now ask me specific questions about {company_to_research}, or say "gener
                         response_text = f"*[Using research data for {st.session_state.current_company}]*\n\n{response_text}"
                     
                     message_placeholder.markdown(response_text)
-                    st.session_state.messages.append({"role": "assistant", "content": response_text})
+                    message_id = add_message("assistant", response_text)
                     
                     # Auto-speak the response if it's not too long
-                    if len(response_text) < 500:  # Don't speak very long responses
-                        speak_text(response_text)
+                    if st.session_state.get('auto_speak', True) and len(response_text) < 500:  # Don't speak very long responses
+                        speak_text(message_id, response_text)
                         
                 else:
-                    error_msg = "❌ Sorry, I'm having trouble responding right now. Please try again."
+                    error_msg = "❌ " + (busy_message(chat_response) or "Sorry, I'm having trouble responding right now. Please try again.")
                     message_placeholder.markdown(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    add_message("assistant", error_msg)
                     
             except Exception as e:
                 error_msg = f"❌ Connection error: {str(e)}"
                 message_placeholder.markdown(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                add_message("assistant", error_msg)
+
+    if not handled_by_chat:
+        sync_session_messages([
+            {"role": "user", "content": prompt},
+            st.session_state.messages[-1]
+        ])
 
 # Account Plan Editor (only shown when specifically requested and generated)
 if st.session_state.account_plan and st.session_state.show_account_plan:
@@ -603,38 +568,39 @@ if st.session_state.account_plan and st.session_state.show_account_plan:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("📥 Download as DOCX"):
+        export_format = st.selectbox(
+            "Format", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get,
+            key="export_format", label_visibility="collapsed"
+        )
+        # Rendered on the backend in memory; keep the bytes until the plan or format changes
+        plan_json = json.dumps([st.session_state.current_company, st.session_state.account_plan], sort_keys=True, default=str)
+        export_key = (export_format, hashlib.sha256(plan_json.encode("utf-8")).hexdigest())
+        prepared = st.session_state.get('prepared_export')
+        if prepared and prepared["key"] == export_key:
+            st.download_button(
+                f"📥 Download {EXPORT_FORMATS[export_format]}",
+                data=prepared["data"],
+                file_name=prepared["filename"],
+                mime=prepared["mime"]
+            )
+        elif st.button("📥 Export Plan"):
             try:
-                from docx import Document
-                doc = Document()
-                doc.add_heading(f'Account Plan: {st.session_state.current_company}', level=1)
-                
-                # Add all sections
-                sections_display = {
-                    'executive_summary': 'Executive Summary',
-                    'company_overview': 'Company Overview', 
-                    'key_contacts': 'Key Contacts',
-                    'strengths_weaknesses': 'Strengths & Weaknesses',
-                    'opportunities_risks': 'Opportunities & Risks',
-                    'engagement_plan': 'Engagement Plan'
-                }
-                
-                for key, display_name in sections_display.items():
-                    doc.add_heading(display_name, level=2)
-                    doc.add_paragraph(st.session_state.account_plan[key])
-                
-                filename = f"account_plan_{st.session_state.current_company.replace(' ', '_').lower()}.docx"
-                doc.save(filename)
-                
-                with open(filename, 'rb') as f:
-                    data = f.read()
-                b64 = base64.b64encode(data).decode()
-                href = f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}">📥 Download DOCX</a>'
-                st.markdown(href, unsafe_allow_html=True)
-                st.success('Document saved successfully!')
-                
-            except ImportError:
-                st.error('python-docx not installed. Run: pip install python-docx')
+                export_response = backend.post(
+                    f"/api/export/{export_format}",
+                    json={"company": st.session_state.current_company, "plan": st.session_state.account_plan},
+                    timeout=(3, 30)
+                )
+                if export_response.status_code == 200:
+                    disposition = export_response.headers.get("Content-Disposition", "")
+                    st.session_state.prepared_export = {
+                        "key": export_key,
+                        "data": export_response.content,
+                        "filename": disposition.split('filename="')[-1].rstrip('"') or f"account_plan.{export_format}",
+                        "mime": export_response.headers.get("Content-Type", "application/octet-stream")
+                    }
+                    st.rerun()
+                else:
+                    st.error(f'Failed to create document: {export_response.json().get("detail", export_response.status_code)}')
             except Exception as e:
                 st.error(f'Failed to create document: {str(e)}')
     
@@ -661,11 +627,51 @@ with st.sidebar:
     
     # Voice settings
     st.subheader("Voice Settings")
-    auto_speak = st.checkbox("Auto-speak responses", value=True)
-    voice_rate = st.slider("Speech Rate", 100, 200, 150)
+    auto_speak = st.checkbox("Auto-speak responses", value=True, key="auto_speak")
+    voice_rate = st.slider("Speech Rate", 100, 200, 150, key="voice_rate")
+    
+    # Recorded call notes: transcribed in the background, then researched in one batch
+    st.subheader("📝 Call Notes")
+    note_files = st.file_uploader(
+        "Upload recorded calls or voice clips", type=UPLOAD_TYPES, accept_multiple_files=True, key="note_files"
+    )
+    if note_files and st.button("📝 Transcribe"):
+        futures = get_transcriber().transcribe_batch([note_file.getvalue() for note_file in note_files])
+        st.session_state.note_requests = dict(zip([note_file.name for note_file in note_files], futures))
+        st.rerun()
     
-    if tts_engine:
-        tts_engine.setProperty('rate', voice_rate)
+    note_requests = st.session_state.note_requests
+    if note_requests and not all(future.done() for future in note_requests.values()):
+        wait_for_notes()
+    elif note_requests:
+        note_results = {name: future.result() for name, future in note_requests.items()}
+        transcripts = [result["text"] for result in note_results.values() if "text" in result]
+        for name, result in note_results.items():
+            with st.expander(f"{'✅' if 'text' in result else '⚠️'} {name}"):
+                st.write(result.get("text", result.get("error")))
+        
+        if len(transcripts) == 1 and st.button("💬 Use as message"):
+            st.session_state.voice_input = transcripts[0]
+            st.session_state.note_requests = {}
+            st.rerun()
+        
+        mentioned = [classify(text).company for text in transcripts]
+        companies_key = hashlib.sha256("\n".join(sorted(note_results)).encode('utf-8')).hexdigest()[:12]
+        companies_text = st.text_area(
+            "Companies to research (one per line)",
+            value="\n".join(dict.fromkeys(company for company in mentioned if company)),
+            key=f"note_companies_{companies_key}"
+        )
+        companies = [line.strip() for line in companies_text.splitlines() if line.strip()]
+        if companies and st.button(f"🔍 Research {len(companies)} companies"):
+            batch_status = st.empty()
+            batch_future = backend.submit(backend.research_batch, companies, session_id=st.session_state.session_id)
+            batch_response = wait_for(batch_future, batch_status, f"🔍 Researching {len(companies)} companies...")
+            if batch_response.status_code == 200:
+                researched = [r["company"] for r in batch_response.json()["results"] if r.get("research_id")]
+                batch_status.success(f"✅ Researched {len(researched)} of {len(companies)}: {', '.join(researched)}")
+            else:
+                batch_status.error(busy_message(batch_response) or f"Batch research failed (HTTP {batch_response.status_code})")
     
     st.markdown("---")
     st.header("💡 How to Use")
@@ -691,27 +697,25 @@ with st.sidebar:
     if st.session_state.current_company:
         st.success(f"✅ Researched: **{st.session_state.current_company}**")
         
-        if st.session_state.research_data and not st.session_state.show_account_plan:
+        if st.session_state.research_id and not st.session_state.show_account_plan:
             if st.button("📊 Generate Account Plan"):
-                st.session_state.messages.append({
-                    "role": "user", 
-                    "content": "generate account plan"
-                })
+                add_message("user", "generate account plan")
                 st.rerun()
     
     if st.button("🗑️ Clear Conversation"):
-        st.session_state.messages = [
-            {
-                "role": "assistant",
-                "content": "Hi! I'm your Company Research Assistant. I can help you research any company and generate editable account plans. Just tell me which company you'd like to research!"
-            }
-        ]
+        try:
+            backend.delete(f"/api/sessions/{st.session_state.session_id}")
+        except Exception:
+            pass
+        st.session_state.session_id = uuid.uuid4().hex
+        reset_messages()
         st.session_state.current_company = None
         st.session_state.research_in_progress = False
         st.session_state.account_plan = None
         st.session_state.show_account_plan = False
-        st.session_state.research_data = None
-        st.session_state.listening = False
+        st.session_state.research_id = None
+        st.session_state.voice_request = None
+        st.session_state.note_requests = {}
         st.session_state.voice_input = ""
         st.rerun()
 
@@ -723,6 +727,11 @@ with st.sidebar:
         pip install SpeechRecognition pyttsx3 pyaudio
         ```
         
+        **Offline recognition (optional):**
+        ```bash
+        pip install pocketsphinx
+        ```
+        
         **On Windows:**
         - PyAudio should install automatically
         
@@ -0,0 +1,179 @@
+import json
+import os
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds per kind of call
+QUICK_TIMEOUT = (3, 10)
+CHAT_TIMEOUT = (3, 60)
+RESEARCH_TIMEOUT = (3, 120)
+PLAN_TIMEOUT = (3, 180)
+
+# Statuses the backend sheds load with; both carry Retry-After
+BUSY_STATUSES = (429, 503)
+
+# Worker threads shared by every browser session of the Streamlit server; a
+# session holds one for its research request and one while a plan streams
+BACKEND_CLIENT_WORKERS = int(os.getenv('BACKEND_CLIENT_WORKERS', '16'))
+
+
+def busy_message(response):
+    """User-facing text for a request the backend shed under load, else None"""
+    if response.status_code not in BUSY_STATUSES:
+        return None
+    retry_after = response.headers.get("Retry-After", "")
+    wait = f" in about {retry_after} seconds" if retry_after.isdigit() else " in a moment"
+    return f"The assistant is busy right now. Please try again{wait}."
+
+
+class BackendClient:
+    """Keep-alive connection pool to the backend plus a pool of worker threads.
+
+    Connection failures and 429/502/503/504 responses are retried with
+    exponential backoff, waiting at least as long as the backend's
+    Retry-After asks. Read timeouts are not
+    retried, since the backend may already be doing the work. The worker
+    threads only make HTTP calls; all Streamlit calls stay on the script
+    thread. Passing session_id sends it as X-Session-ID, which the backend
+    scheduler uses to share capacity fairly between browser sessions.
+    """
+
+    def __init__(self, base_url, pool_size=None, workers=BACKEND_CLIENT_WORKERS, retries=3, backoff=0.5):
+        # Every worker can hold a connection, plus a few for quick calls from script threads
+        pool_size = pool_size or workers + 4
+        self.base_url = base_url.rstrip("/")
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "POST", "DELETE"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backend")
+
+    def request(self, method, path, timeout=QUICK_TIMEOUT, session_id=None, **kwargs):
+        if session_id:
+            kwargs["headers"] = dict(kwargs.get("headers") or {}, **{"X-Session-ID": session_id})
+        return self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on a worker thread and return its Future"""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def research(self, company, fetch_news=True, fields="", session_id=None):
+        """Run research; by default the raw data stays on the backend (see research_id)"""
+        return self.post(
+            "/api/research",
+            params={"fields": fields},
+            json={"company": company, "fetch_news": fetch_news},
+            timeout=RESEARCH_TIMEOUT,
+            session_id=session_id
+        )
+
+    def research_batch(self, companies, fetch_news=True, fields="", session_id=None):
+        """Research many companies in one call; results come back in order"""
+        return self.post(
+            "/api/research/batch",
+            params={"fields": fields},
+            json={"companies": companies, "fetch_news": fetch_news},
+            timeout=RESEARCH_TIMEOUT,
+            session_id=session_id
+        )
+
+    def account_plan(self, company, research_id, session_id=None):
+        return self.post(
+            "/api/generate-account-plan",
+            json={"company": company, "research_id": research_id},
+            timeout=PLAN_TIMEOUT,
+            session_id=session_id
+        )
+
+    def account_plan_stream(self, company, research_id, session_id=None):
+        """Yield events from the streaming plan endpoint as they arrive"""
+        with self.post(
+            "/api/generate-account-plan/stream",
+            json={"company": company, "research_id": research_id},
+            timeout=PLAN_TIMEOUT,
+            stream=True,
+            session_id=session_id
+        ) as response:
+            if response.status_code != 200:
+                yield {"error": busy_message(response) or f"Account plan generation failed (HTTP {response.status_code})"}
+                return
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def _collect_plan(self, company, research_id, events, session_id=None):
+        """Forward section events to the queue; returns the plan or an {"error"} dict"""
+        for event in self.account_plan_stream(company, research_id, session_id):
+            if "section" in event:
+                events.put(event)
+            else:
+                return event.get("plan", event)
+        return {"error": "Account plan stream ended early"}
+
+    def account_plan_in_background(self, company, research_id, session_id=None):
+        """Stream a plan on a worker thread.
+
+        Returns (future, events): completed sections are put on the events
+        queue as {"section", "content"} while the future resolves to the
+        full plan or an {"error"} dict.
+        """
+        events = queue.Queue()
+        return self.submit(self._collect_plan, company, research_id, events, session_id), events
+
+    def research_and_plan(self, company, fetch_news=True, session_id=None):
+        """Start research, and stream the account plan as soon as the research data arrives.
+
+        Returns (research future, plan future, plan events) with the plan
+        parts as in account_plan_in_background.
+        """
+        research = self.submit(self.research, company, fetch_news, session_id=session_id)
+        events = queue.Queue()
+        plan = Future()
+
+        def start_plan(done):
+            # Runs when the research request finishes; no worker waits for it
+            try:
+                response = done.result()
+                research_id = response.json().get("research_id") if response.status_code == 200 else None
+            except Exception as e:
+                plan.set_exception(e)
+                return
+            if not research_id:
+                plan.set_result({"error": "Research failed"})
+                return
+            _relay(self.submit(self._collect_plan, company, research_id, events, session_id), plan)
+
+        research.add_done_callback(start_plan)
+        return research, plan, events
+
+
+def _relay(source, target):
+    """Complete the target future with the outcome of source once it is done"""
+    def copy(done):
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+    source.add_done_callback(copy)
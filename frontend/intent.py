@@ -0,0 +1,195 @@
+import functools
+import re
+from typing import NamedTuple, Optional
+
+# Keyword lists. Order matters where noted: extract_company tries research
+# keywords in list order, exactly like the original per-function scans.
+RESEARCH_KEYWORDS = (
+    'research', 'analyze', 'study', 'look up', 'find info',
+    'tell me about', 'generate account plan', 'create account plan',
+    'make account plan', 'build account plan'
+)
+EXTRACTION_KEYWORDS = RESEARCH_KEYWORDS + ('account plan for', 'research on', 'analyze on')
+PLAN_KEYWORDS = (
+    'account plan', 'generate plan', 'create plan', 'make plan',
+    'build plan', 'business plan', 'strategy plan'
+)
+FOLLOW_UP_PHRASES = ('what about', 'how about', 'can you', 'what if')
+VAGUE_PHRASES = (
+    'something about', 'some companies', 'any company', 'a company',
+    'companies in general', 'business in general', 'tell me about companies',
+    'research companies'
+)
+COMPANY_INDICATORS = (
+    'microsoft', 'apple', 'google', 'amazon', 'tesla', 'netflix',
+    'meta', 'facebook', 'ibm', 'intel', 'samsung', 'sony'
+)
+GIBBERISH_PATTERNS = (
+    'asdf', 'jkl', 'qwerty', 'zxcv', 'lorem', 'ipsum', 'dolor', 'sit', 'amet',
+    'test', 'example', 'sample', 'random', 'foo', 'bar', 'baz'
+)
+MEANINGLESS_PHRASES = (
+    'from my dreams', 'from my imagination', 'my dreams', 'my imagination',
+    'something about', 'some company', 'any company', 'what were', 'were doing',
+    'cousin works', 'says coffee', 'coffee great'
+)
+COMMON_SHORT_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our',
+    'out', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who',
+    'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'
+])
+AFTER_KEYWORD_SKIP = frozenset(['the', 'a', 'an', 'about', 'on', 'for', 'and', 'but', 'anyway'])
+AFTER_KEYWORD_STOP = frozenset(['my', 'i', 'we', 'you', 'anyway', 'what', 'were'])
+FALLBACK_SKIP = frozenset([
+    'the', 'a', 'an', 'about', 'on', 'for', 'something', 'companies', 'business',
+    'lorem', 'ipsum', 'from', 'my', 'dreams', 'corporation', 'company',
+    'cousin', 'works', 'says', 'coffee', 'great', 'anyway', 'what', 'were', 'doing'
+]) | frozenset(EXTRACTION_KEYWORDS)
+
+
+def _alternation(phrases):
+    # Longest first so overlapping phrases resolve to the longest match
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+def _contains_any(phrases):
+    return re.compile(_alternation(phrases)).search
+
+
+# Zero-width lookahead so every start position is reported, including overlaps
+_KEYWORD_POSITIONS = re.compile(f"(?=({_alternation(EXTRACTION_KEYWORDS)}))")
+_has_research_keyword = _contains_any(RESEARCH_KEYWORDS)
+_has_plan_keyword = _contains_any(PLAN_KEYWORDS)
+_has_follow_up = _contains_any(FOLLOW_UP_PHRASES)
+_has_vague_phrase = _contains_any(VAGUE_PHRASES)
+_has_company_indicator = _contains_any(COMPANY_INDICATORS)
+_has_gibberish_pattern = _contains_any(GIBBERISH_PATTERNS)
+_has_meaningless_phrase = _contains_any(MEANINGLESS_PHRASES)
+_REPEATED_CHAR = re.compile(r'(.)\1{3,}')
+_WHITESPACE = re.compile(r'\s')
+
+_DROP_CONSONANTS = str.maketrans('', '', 'bcdfghjklmnpqrstvwxyz')
+_DROP_VOWELS = str.maketrans('', '', 'aeiou')
+
+
+def _unbalanced(word):
+    """Too many consonants or vowels for a real word (only checked for len > 3)"""
+    consonants = len(word) - len(word.translate(_DROP_CONSONANTS))
+    vowels = len(word) - len(word.translate(_DROP_VOWELS))
+    return consonants > vowels * 2 or vowels > consonants * 2
+
+
+def contains_gibberish(text):
+    """Check if text contains obvious gibberish patterns"""
+    text_lower = text.lower()
+    if not _WHITESPACE.search(text_lower):
+        return _word_is_gibberish(text_lower)
+    if _REPEATED_CHAR.search(text_lower) or _has_gibberish_pattern(text_lower):
+        return True
+    if any(len(word) > 3 and _unbalanced(word) for word in text_lower.split()):
+        return True
+    return len(text_lower) < 4 and text_lower not in COMMON_SHORT_WORDS
+
+
+@functools.lru_cache(maxsize=4096)
+def _word_is_gibberish(word):
+    """contains_gibberish() for a single lowercase token, memoized across calls"""
+    if _REPEATED_CHAR.search(word) or _has_gibberish_pattern(word):
+        return True
+    if len(word) > 3 and _unbalanced(word):
+        return True
+    return len(word) < 4 and word not in COMMON_SHORT_WORDS
+
+
+def is_valid_company_name(company_name):
+    """Validate if the extracted company name is likely to be a real company"""
+    if contains_gibberish(company_name):
+        return False
+    if _has_meaningless_phrase(company_name.lower()):
+        return False
+    if len(company_name) < 2 or len(company_name) > 50:
+        return False
+    words = company_name.split()
+    if len(words) == 1:
+        return True
+    # For multi-word names, enough words must start with a capital letter
+    capitalized_words = sum(1 for word in words if word and word[0].isupper())
+    return capitalized_words >= len(words) * 0.3
+
+
+def is_account_plan_request(prompt_lower):
+    return _has_plan_keyword(prompt_lower) is not None
+
+
+def is_research_request(prompt_lower, words, current_company=None):
+    """Explicit research keyword, or a follow-up about something other than current_company"""
+    if _has_research_keyword(prompt_lower):
+        return True
+    if not current_company or not _has_follow_up(prompt_lower):
+        return False
+    current_lower = current_company.lower()
+    return any(
+        word not in RESEARCH_KEYWORDS and len(word) > 2
+        and word != current_lower and word.title() != current_company
+        for word in words
+    )
+
+
+def extract_company(prompt_lower, words):
+    """Extract company name from a research request, or None for vague requests"""
+    # FIRST: words after a research keyword, trying keywords in list order
+    first_positions = {}
+    for match in _KEYWORD_POSITIONS.finditer(prompt_lower):
+        longest = match.group(1)
+        # Keywords that are prefixes of the longest match start here as well
+        for keyword in EXTRACTION_KEYWORDS:
+            if longest.startswith(keyword) and keyword not in first_positions:
+                first_positions[keyword] = match.start()
+    for keyword in EXTRACTION_KEYWORDS:
+        position = first_positions.get(keyword)
+        if position is None:
+            continue
+        potential_company_words = []
+        for word in prompt_lower[position + len(keyword):].split():
+            if word not in AFTER_KEYWORD_SKIP and len(word) > 2 and not _word_is_gibberish(word):
+                potential_company_words.append(word)
+                # Stop if we hit conversational markers
+                if word in AFTER_KEYWORD_STOP:
+                    break
+        if potential_company_words:
+            company_name = ' '.join(potential_company_words).title()
+            if is_valid_company_name(company_name):
+                return company_name
+
+    # SECOND: vague requests without a specific company need clarification
+    if _has_vague_phrase(prompt_lower) and not _has_company_indicator(prompt_lower):
+        return None
+
+    # THIRD: fallback - every remaining meaningful word
+    filtered_words = [
+        word for word in words
+        if word not in FALLBACK_SKIP and len(word) > 1
+        and not word.isnumeric() and not _word_is_gibberish(word)
+    ]
+    company_name = ' '.join(filtered_words).title()
+    if len(company_name.strip()) < 2 or not is_valid_company_name(company_name):
+        return None
+    return company_name.strip()
+
+
+class Intent(NamedTuple):
+    is_account_plan: bool
+    is_research: bool
+    company: Optional[str]
+
+
+def classify(prompt, current_company=None):
+    """Detect plan/research intent and the company in one pass over the prompt"""
+    prompt_lower = prompt.lower()
+    words = prompt_lower.split()
+    is_research = is_research_request(prompt_lower, words, current_company)
+    return Intent(
+        is_account_plan=is_account_plan_request(prompt_lower),
+        is_research=is_research,
+        company=extract_company(prompt_lower, words) if is_research else None
+    )
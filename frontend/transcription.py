@@ -0,0 +1,163 @@
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+STT_WORKERS = int(os.getenv('STT_WORKERS', '2'))
+# auto: Google Web Speech, falling back to offline CMU Sphinx when it is unreachable
+# google / sphinx: only that engine
+STT_ENGINE = os.getenv('STT_ENGINE', 'auto').lower()
+STT_CALIBRATION_SECONDS = float(os.getenv('STT_CALIBRATION_SECONDS', '1'))
+STT_CALIBRATION_TTL = int(os.getenv('STT_CALIBRATION_TTL', '300'))
+# Long clips are recognized in pieces of this many seconds
+STT_CHUNK_SECONDS = int(os.getenv('STT_CHUNK_SECONDS', '30'))
+STT_CACHE_SIZE = int(os.getenv('STT_CACHE_SIZE', '256'))
+
+UPLOAD_TYPES = ['wav', 'flac', 'aiff', 'aif']
+NOT_UNDERSTOOD = "Sorry, I couldn't understand the audio."
+NOT_INSTALLED = "Voice input needs SpeechRecognition: pip install SpeechRecognition pyaudio"
+
+
+class TranscriptionService:
+    """Speech recognition on worker threads for microphone input and uploaded clips.
+
+    Every call returns a Future resolving to {"text", "engine", "seconds"}
+    or {"error"}, so the Streamlit script never blocks on recording or
+    recognition. The ambient-noise calibration of the microphone is reused
+    for STT_CALIBRATION_TTL seconds instead of being measured on every
+    click. Uploaded clips are transcribed in STT_CHUNK_SECONDS pieces and
+    their transcripts cached by content hash.
+    """
+
+    def __init__(self, engine=STT_ENGINE, workers=STT_WORKERS, cache_size=STT_CACHE_SIZE):
+        self.engine = engine
+        self.sphinx = importlib.util.find_spec('pocketsphinx') is not None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stt')
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        # There is one microphone; recordings take turns
+        self.mic_lock = threading.Lock()
+        self.energy_threshold = None
+        self.calibrated_at = 0.0
+        self.pending = {}
+        self.results = OrderedDict()
+
+    def _recognize(self, recognizer, audio):
+        """(text, engine name); raises sr.UnknownValueError when nothing was understood"""
+        import speech_recognition as sr
+        if self.engine != 'sphinx':
+            try:
+                return recognizer.recognize_google(audio), 'google'
+            except sr.RequestError:
+                if self.engine == 'google' or not self.sphinx:
+                    raise
+        return recognizer.recognize_sphinx(audio), 'sphinx'
+
+    def _calibrate(self, recognizer, source):
+        """Apply the cached noise threshold, measuring it again once it is stale"""
+        with self.lock:
+            fresh = self.energy_threshold is not None and time.monotonic() - self.calibrated_at < STT_CALIBRATION_TTL
+            if fresh:
+                recognizer.energy_threshold = self.energy_threshold
+        if not fresh:
+            recognizer.adjust_for_ambient_noise(source, duration=STT_CALIBRATION_SECONDS)
+            with self.lock:
+                self.calibrated_at = time.monotonic()
+        with self.lock:
+            self.energy_threshold = recognizer.energy_threshold
+
+    def _record(self, timeout, phrase_time_limit):
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            return {"error": NOT_INSTALLED}
+        recognizer = sr.Recognizer()
+        try:
+            with self.mic_lock, sr.Microphone() as source:
+                self._calibrate(recognizer, source)
+                audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                # listen() adapts the threshold to the room; keep it for the next recording
+                with self.lock:
+                    self.energy_threshold = recognizer.energy_threshold
+        except sr.WaitTimeoutError:
+            return {"error": "No speech detected. Please try again."}
+        except Exception as e:
+            return {"error": f"Error with microphone: {str(e)}"}
+        try:
+            text, engine = self._recognize(recognizer, audio)
+        except sr.UnknownValueError:
+            return {"error": NOT_UNDERSTOOD}
+        except sr.RequestError:
+            return {"error": "Sorry, there was an error with the speech recognition service."}
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        return {"text": text, "engine": engine, "seconds": seconds}
+
+    def record(self, timeout=10, phrase_time_limit=15):
+        """Record one phrase from the microphone and transcribe it"""
+        return self.executor.submit(self._record, timeout, phrase_time_limit)
+
+    def _transcribe_clip(self, data):
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            return {"error": NOT_INSTALLED}
+        recognizer = sr.Recognizer()
+        texts = []
+        engine = None
+        try:
+            with sr.AudioFile(io.BytesIO(data)) as source:
+                seconds = source.DURATION
+                while True:
+                    audio = recognizer.record(source, duration=STT_CHUNK_SECONDS)
+                    if not audio.frame_data:
+                        break
+                    try:
+                        text, engine = self._recognize(recognizer, audio)
+                    except sr.UnknownValueError:
+                        continue  # a silent or unclear piece of a longer note
+                    texts.append(text)
+        except sr.RequestError:
+            return {"error": "Sorry, there was an error with the speech recognition service."}
+        except Exception as e:
+            return {"error": f"Could not read audio: {str(e)}"}
+        if not texts:
+            return {"error": NOT_UNDERSTOOD}
+        return {"text": " ".join(texts), "engine": engine, "seconds": seconds}
+
+    def _run(self, key, data):
+        result = {}
+        try:
+            result = self._transcribe_clip(data)
+            return result
+        finally:
+            with self.lock:
+                # Only transcripts are cached; errors (e.g. the service being down) are retried
+                if "text" in result:
+                    self.results[key] = result
+                    while len(self.results) > self.cache_size:
+                        self.results.popitem(last=False)
+                self.pending.pop(key, None)
+
+    def transcribe(self, data):
+        """Transcribe a WAV/AIFF/FLAC clip given as bytes; already done when it was transcribed before"""
+        key = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            result = self.results.get(key)
+            if result is not None:
+                self.results.move_to_end(key)
+                future = Future()
+                future.set_result(result)
+                return future
+            future = self.pending.get(key)
+            if future is None:
+                future = self.executor.submit(self._run, key, data)
+                self.pending[key] = future
+            return future
+
+    def transcribe_batch(self, clips):
+        """Futures for many clips at once; the worker pool transcribes STT_WORKERS of them in parallel"""
+        return [self.transcribe(data) for data in clips]
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'company-research-tts'))
+TTS_CACHE_MB = int(os.getenv('TTS_CACHE_MB', '200'))
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', '2'))
+TTS_VOLUME = 0.8
+
+MIME_TYPES = {'.mp3': 'audio/mpeg', '.wav': 'audio/wav'}
+
+
+def mime_type(path):
+    return MIME_TYPES.get(os.path.splitext(path)[1], 'audio/wav')
+
+
+class TTSService:
+    """Renders text to audio files for the browser, cached on disk by content hash.
+
+    pyttsx3 engines are not thread-safe, so synthesis itself runs under one
+    lock; the worker pool bounds how many jobs are queued or compressing at
+    once. When ffmpeg is installed the raw WAV is compressed to MP3. The
+    cache directory is trimmed least recently used first once it passes
+    TTS_CACHE_MB.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MB * 1024 * 1024, workers=TTS_WORKERS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts')
+        self.engine = None
+        self.engine_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.pending = {}
+        # key -> (path, size), least recently used first
+        self.files = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+        for path in sorted(paths, key=os.path.getmtime):
+            key, ext = os.path.splitext(os.path.basename(path))
+            if ext in MIME_TYPES and '.' not in key:
+                self._remember(key, path, os.path.getsize(path))
+
+    def _engine(self):
+        if self.engine is None:
+            import pyttsx3
+            self.engine = pyttsx3.init()
+            voices = self.engine.getProperty('voices')
+            if voices:
+                self.engine.setProperty('voice', voices[0].id)  # Use first available voice
+            self.engine.setProperty('volume', TTS_VOLUME)
+        return self.engine
+
+    def cache_key(self, text, rate):
+        settings = f"voice0|{rate}|{TTS_VOLUME}|{'mp3' if self.ffmpeg else 'wav'}"
+        return hashlib.sha256(f"{settings}\n{text}".encode('utf-8')).hexdigest()[:32]
+
+    def _remember(self, key, path, size):
+        """Record a cache file and evict the oldest ones over budget (lock held)"""
+        old = self.files.pop(key, None)
+        if old:
+            self.total_bytes -= old[1]
+        self.files[key] = (path, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.files) > 1:
+            _, (old_path, old_size) = self.files.popitem(last=False)
+            self.total_bytes -= old_size
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _cached(self, key):
+        """Path of a cached file, marked as recently used (lock held)"""
+        entry = self.files.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(entry[0]):
+            del self.files[key]
+            self.total_bytes -= entry[1]
+            return None
+        self.files.move_to_end(key)
+        return entry[0]
+
+    def _synthesize(self, key, text, rate):
+        raw_path = os.path.join(self.cache_dir, f"{key}.partial.wav")
+        with self.engine_lock:
+            engine = self._engine()
+            engine.setProperty('rate', rate)
+            engine.save_to_file(text, raw_path)
+            engine.runAndWait()
+        path = os.path.join(self.cache_dir, f"{key}.wav")
+        if self.ffmpeg:
+            mp3_path = os.path.join(self.cache_dir, f"{key}.mp3")
+            result = subprocess.run(
+                [self.ffmpeg, '-y', '-loglevel', 'error', '-i', raw_path,
+                 '-codec:a', 'libmp3lame', '-q:a', '6', mp3_path],
+                capture_output=True
+            )
+            if result.returncode == 0:
+                os.remove(raw_path)
+                path = mp3_path
+        if path.endswith('.wav'):
+            os.replace(raw_path, path)
+        with self.lock:
+            self._remember(key, path, os.path.getsize(path))
+        return path, mime_type(path)
+
+    def _run(self, key, text, rate):
+        try:
+            return self._synthesize(key, text, rate)
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def request(self, text, rate):
+        """Future resolving to (audio file path, mime type); already done for cached audio.
+
+        Identical requests while one is being synthesized share its future.
+        """
+        key = self.cache_key(text, rate)
+        with self.lock:
+            path = self._cached(key)
+            if path is not None:
+                future = Future()
+                future.set_result((path, mime_type(path)))
+                return future
+            future = self.pending.get(key)
+            if future is None:
+                future = self.executor.submit(self._run, key, text, rate)
+                self.pending[key] = future
+            return future
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend import admission, metrics
+
+ROUTES = {"/api/generate-account-plan/stream": "plan"}
+
+
+def _scope(path="/api/generate-account-plan/stream"):
+    return {"type": "http", "method": "POST", "path": path, "headers": [(b"x-session-id", b"s1")],
+            "client": ("127.0.0.1", 5000)}
+
+
+def _middleware(app):
+    return admission.AdmissionMiddleware(app, route_path=lambda scope: scope["path"], routes=ROUTES)
+
+
+def _in_flight():
+    return metrics.WORK_IN_FLIGHT.get(work_class="plan")
+
+
+async def _disconnect():
+    return {"type": "http.disconnect"}
+
+
+def test_streaming_request_counts_until_body_is_sent():
+    seen = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"a", b"b"):
+            seen.append(_in_flight())
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    asyncio.run(_middleware(app)(_scope(), _disconnect, send))
+    assert seen == [1, 1]
+    assert _in_flight() == 0
+
+
+def test_abandoned_stream_releases_in_flight():
+    async def run():
+        streaming = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            streaming.set()
+            await asyncio.Event().wait()  # the body is never produced
+
+        async def send(message):
+            pass
+
+        task = asyncio.ensure_future(_middleware(app)(_scope(), _disconnect, send))
+        await streaming.wait()
+        assert _in_flight() == 1
+        task.cancel()  # the client went away before the body was iterated
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert _in_flight() == 0
+
+
+def test_failed_send_releases_in_flight():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"a", "more_body": True})
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        asyncio.run(_middleware(app)(_scope(), _disconnect, send))
+    assert _in_flight() == 0
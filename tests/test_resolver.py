@@ -0,0 +1,28 @@
+from backend.companies import aliases
+from backend.resolver import CompanyResolver
+
+
+def _resolver():
+    resolver = CompanyResolver()
+    resolver.add("Microsoft")
+    return resolver
+
+
+def test_researched_typo_is_not_a_suggestion():
+    resolver = _resolver()
+    company_id = aliases.learn("Mircosfot", "Microsoft")
+    resolver.add_researched(company_id)
+
+    names = [candidate["name"] for candidate in resolver.lookup("Micrsofot")]
+    assert names == ["Microsoft"]
+    assert resolver.lookup("Mircosfot")[0]["name"] == "Microsoft"
+    assert "mircosfot" not in resolver.terms
+
+
+def test_researched_company_is_indexed_by_canonical_name():
+    resolver = _resolver()
+    company_id = aliases.learn("Zorblax Corp", "Zorblax Industries")
+    resolver.add_researched(company_id)
+
+    assert resolver.lookup("Zorblax Industries")[0]["distance"] == 0
+    assert resolver.lookup("Zorblax Industires")[0]["name"] == "Zorblax Industries"
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from backend.response_cache import ResponseCache, normalize_question
+
+
+class _Research:
+    version = "v1"
+    fetched_at = time.time()
+
+
+@pytest.mark.parametrize("question", [
+    "Microsoft recent contracts?",
+    "What are Microsoft's recent contracts?",
+    "What are Microsoft’s recent contracts?",
+    "What are the recent contracts of Microsoft?",
+    "What recent contracts has Microsoft won?",
+])
+def test_paraphrases_normalize_alike(question):
+    assert normalize_question(question, "Microsoft") == ["recent", "contract"]
+
+
+@pytest.mark.parametrize("question", [
+    "What are Microsoft's recent contracts?",
+    "What are the recent contracts of Microsoft?",
+    "What recent contracts has Microsoft won?",
+])
+def test_possessive_and_reordered_phrasings_hit(question):
+    cache = ResponseCache(threshold=0.8, ttl=3600)
+    cache.store("microsoft", _Research, "Microsoft recent contracts?", "answer")
+    assert cache.lookup("microsoft", _Research, question) == "answer"
+
+
+def test_different_topic_misses():
+    cache = ResponseCache(threshold=0.8, ttl=3600)
+    cache.store("microsoft", _Research, "What are Microsoft's recent contracts?", "answer")
+    assert cache.lookup("microsoft", _Research, "Who is Microsoft's CEO?") is None